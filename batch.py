@@ -0,0 +1,255 @@
+# Execução em lote de partidas do Space Raiders
+#
+# Roda milhares de partidas sem janela (driver de vídeo "dummy" do SDL),
+# dividindo as sementes entre processos, um por núcleo. Cada partida é jogada
+# por um agente (aleatório ou roteirizado) até todos os jogadores morrerem ou
+# até o limite de frames. Os resultados chegam em blocos e são somados num
+# relatório agregado; com --out, cada partida vira uma linha em CSV (.csv) ou
+# JSON Lines, gravada assim que o bloco termina.
+#
+#   python batch.py --sessions 2000 --agent random
+#   python batch.py --sessions 2000 --health-chance 50 --out sessoes.csv
+
+import os
+import sys
+import csv
+import json
+import math
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # as sprites são carregadas com caminhos relativos
+
+import spaceraiders as sr
+
+SESSION_FIELDS = ['seed', 'score', 'frames', 'health_powerups', 'bomb_powerups', 'survived']
+
+# Agentes: recebem a semente e devolvem a função que dá os bits de input de
+# cada jogador no frame n. Usam um rng próprio para não mexer no sorteio do jogo.
+
+# Segura uma direção aleatória por alguns frames e atira quase sempre
+def random_agent(seed, num_players):
+    rng = random.Random(seed ^ 0x5EED)
+    moves = [0] * num_players
+    def inputs(n):
+        result = []
+        for idx in range(num_players):
+            if n % 15 == 0:
+                moves[idx] = rng.choice([0, sr.INPUT_LEFT, sr.INPUT_RIGHT]) | rng.choice([0, 0, sr.INPUT_UP, sr.INPUT_DOWN])
+            shoot = sr.INPUT_SHOOT if n % 2 == 0 and rng.random() < 0.8 else 0
+            result.append(moves[idx] | shoot)
+        return result
+    return inputs
+
+# Vai de um lado para o outro da tela atirando
+def sweep_agent(seed, num_players):
+    def inputs(n):
+        move = sr.INPUT_LEFT if (n // 90) % 2 else sr.INPUT_RIGHT
+        shoot = sr.INPUT_SHOOT if n % 2 == 0 else 0
+        return [move | shoot] * num_players
+    return inputs
+
+# Fica parado sem atirar
+def idle_agent(seed, num_players):
+    def inputs(n):
+        return [0] * num_players
+    return inputs
+
+AGENTS = {
+    'random': random_agent,
+    'sweep': sweep_agent,
+    'idle': idle_agent,
+}
+
+# Ajusta as regras de spawn de power-ups no processo atual
+def configure(spawn_rules):
+    for name, value in spawn_rules.items():
+        setattr(sr, name, value)
+
+def run_session(seed, agent, num_players, max_frames, entity_store=False, waves=None):
+    state = sr.GameState(0, 1 if num_players == 2 else None, seed=seed, entity_store=entity_store, waves=waves)
+    inputs = AGENTS[agent](seed, num_players)
+    while state.frame < max_frames and not state.all_dead():
+        state.step(inputs(state.frame))
+    return {
+        'seed': seed,
+        'score': state.score,
+        'frames': state.frame,
+        'health_powerups': state.stats['health_powerups'],
+        'bomb_powerups': state.stats['bomb_powerups'],
+        'survived': not state.all_dead(),
+    }
+
+# Executado nos processos: roda um bloco de sementes
+def run_shard(seeds, agent, num_players, max_frames, entity_store, spawn_rules, waves=None):
+    configure(spawn_rules)
+    return [run_session(seed, agent, num_players, max_frames, entity_store, waves) for seed in seeds]
+
+# Soma os resultados sem guardar as partidas (média e desvio por Welford)
+class Aggregate:
+    metrics = ['score', 'frames', 'health_powerups', 'bomb_powerups']
+
+    def __init__(self):
+        self.sessions = 0
+        self.survived = 0
+        self.mean = dict.fromkeys(self.metrics, 0.0)
+        self.m2 = dict.fromkeys(self.metrics, 0.0)
+        self.min = {}
+        self.max = {}
+        self.best = None
+        self.worst = None
+
+    def add(self, session):
+        self.sessions += 1
+        self.survived += session['survived']
+        for name in self.metrics:
+            value = session[name]
+            delta = value - self.mean[name]
+            self.mean[name] += delta / self.sessions
+            self.m2[name] += delta * (value - self.mean[name])
+            self.min[name] = min(self.min.get(name, value), value)
+            self.max[name] = max(self.max.get(name, value), value)
+        if self.best is None or session['score'] > self.best['score']:
+            self.best = session
+        if self.worst is None or session['score'] < self.worst['score']:
+            self.worst = session
+
+    def std(self, name):
+        if self.sessions < 2:
+            return 0.0
+        return math.sqrt(self.m2[name] / (self.sessions - 1))
+
+    def report(self):
+        result = {'sessions': self.sessions, 'survived': self.survived}
+        for name in self.metrics:
+            result[name] = {
+                'mean': self.mean[name],
+                'std': self.std(name),
+                'min': self.min.get(name, 0),
+                'max': self.max.get(name, 0),
+            }
+        total_frames = self.mean['frames'] * self.sessions
+        if total_frames:
+            for name in ('health_powerups', 'bomb_powerups'):
+                result[name]['per_1000_frames'] = 1000 * self.mean[name] * self.sessions / total_frames
+        result['best'] = self.best
+        result['worst'] = self.worst
+        return result
+
+# Grava cada partida assim que chega, em CSV ou JSON Lines
+class SessionWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.csv = None
+        if path.endswith(".csv"):
+            self.csv = csv.DictWriter(self.file, SESSION_FIELDS)
+            self.csv.writeheader()
+
+    def write(self, session):
+        if self.csv:
+            self.csv.writerow(session)
+        else:
+            self.file.write(json.dumps(session) + "\n")
+
+    def close(self):
+        self.file.close()
+
+def shards(first_seed, sessions, chunk):
+    for start in range(first_seed, first_seed + sessions, chunk):
+        yield range(start, min(start + chunk, first_seed + sessions))
+
+# Distribui os blocos entre os processos, com no máximo dois blocos por
+# processo em espera, e agrega os resultados na ordem em que terminam
+def run_batch(sessions, first_seed=0, agent='random', num_players=1, max_frames=18000,
+              workers=None, chunk=25, entity_store=False, spawn_rules=None, writer=None, waves=None):
+    spawn_rules = spawn_rules or {}
+    workers = workers or os.cpu_count() or 1
+    aggregate = Aggregate()
+    pending = set()
+    todo = shards(first_seed, sessions, chunk)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            for seeds in todo:
+                pending.add(executor.submit(run_shard, seeds, agent, num_players, max_frames,
+                                            entity_store, spawn_rules, waves))
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for session in future.result():
+                    aggregate.add(session)
+                    if writer:
+                        writer.write(session)
+    return aggregate
+
+def print_report(report, elapsed):
+    print(f"{report['sessions']} partidas em {elapsed:.1f} s "
+          f"({report['sessions'] / elapsed:.1f} partidas/s, "
+          f"{report['frames']['mean'] * report['sessions'] / elapsed:.0f} frames/s)")
+    print(f"sobreviveram até o limite: {report['survived']}")
+    for name in Aggregate.metrics:
+        metric = report[name]
+        line = (f"{name:<16} média {metric['mean']:>9.2f}  desvio {metric['std']:>9.2f}  "
+                f"mín {metric['min']:>7}  máx {metric['max']:>7}")
+        if 'per_1000_frames' in metric:
+            line += f"  {metric['per_1000_frames']:.3f}/1000 frames"
+        print(line)
+    if report['best']:
+        print(f"melhor semente {report['best']['seed']} (score {report['best']['score']}), "
+              f"pior semente {report['worst']['seed']} (score {report['worst']['score']})")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Partidas do Space Raiders em lote, sem janela")
+    parser.add_argument("--sessions", type=int, default=1000, help="número de partidas")
+    parser.add_argument("--seed", type=int, default=0, help="primeira semente (as partidas usam sementes seguidas)")
+    parser.add_argument("--agent", choices=sorted(AGENTS), default="random", help="quem joga")
+    parser.add_argument("--players", type=int, choices=[1, 2], default=1, help="número de jogadores")
+    parser.add_argument("--max-frames", type=int, default=18000, help="limite de frames por partida")
+    parser.add_argument("--workers", type=int, help="processos (padrão: um por núcleo)")
+    parser.add_argument("--chunk", type=int, default=25, help="partidas por bloco enviado a um processo")
+    parser.add_argument("--entity-store", action="store_true", help="inimigos e tiros em arrays NumPy")
+    parser.add_argument("--health-frames", type=int, default=sr.HEALTH_SPAWN_FRAMES, help="frames entre sorteios de vida")
+    parser.add_argument("--health-chance", type=int, default=sr.HEALTH_SPAWN_CHANCE, help="chance de vida, em %%")
+    parser.add_argument("--bomb-frames", type=int, default=sr.BOMB_SPAWN_FRAMES, help="frames entre sorteios de bomba")
+    parser.add_argument("--bomb-chance", type=int, default=sr.BOMB_SPAWN_CHANCE, help="chance de bomba, em %%")
+    parser.add_argument("--waves", metavar="ARQUIVO", help="ondas de inimigos e power-ups (JSON); substitui as opções acima")
+    parser.add_argument("--out", metavar="ARQUIVO", help="grava cada partida em CSV (.csv) ou JSON Lines")
+    parser.add_argument("--report", metavar="ARQUIVO", help="salva o relatório agregado (JSON)")
+    args = parser.parse_args(argv)
+
+    # Com --waves os power-ups vêm do arquivo e as opções de spawn não valem
+    waves = sr.load_wave_config(args.waves) if args.waves else None
+    spawn_rules = None if waves else {
+        'HEALTH_SPAWN_FRAMES': args.health_frames,
+        'HEALTH_SPAWN_CHANCE': args.health_chance,
+        'BOMB_SPAWN_FRAMES': args.bomb_frames,
+        'BOMB_SPAWN_CHANCE': args.bomb_chance,
+    }
+    writer = SessionWriter(args.out) if args.out else None
+    start = time.perf_counter()
+    try:
+        aggregate = run_batch(args.sessions, args.seed, args.agent, args.players, args.max_frames,
+                              args.workers, args.chunk, args.entity_store, spawn_rules, writer, waves)
+    finally:
+        if writer:
+            writer.close()
+    report = aggregate.report()
+    if waves:
+        report['waves'] = waves
+    else:
+        report['spawn_rules'] = spawn_rules
+    print_report(report, time.perf_counter() - start)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# Benchmark das colisões: grade (spatial hash) contra pygame.sprite
+#
+# Monta inimigos agrupados numa região da tela, tiros subindo por cima deles,
+# dois jogadores e power-ups, e mede o tempo das colisões de um frame do jogo
+# (montar a grade, tiros contra inimigos e jogadores contra inimigos e
+# power-ups) com spaceraiders.SpatialHash e com as funções de pygame.sprite.
+# Também confere se os dois caminhos acertam os mesmos sprites na mesma ordem.
+#
+#   python benchmarks/collisions.py
+#   python benchmarks/collisions.py --sizes 100 1000 --repeat 50
+
+import os
+import sys
+import time
+import random
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # as sprites são carregadas com caminhos relativos
+
+import pygame
+import spaceraiders as sr
+
+SEED = 1234
+SIZES = [5, 100, 500, 2000]
+
+# Inimigos numa região de 600x400 no meio da tela (quanto mais inimigos,
+# mais cheias ficam as células), um tiro para cada cinco inimigos
+def make_scene(count, seed=SEED):
+    rng = random.Random(seed)
+    scene = {
+        'enemies': pygame.sprite.Group(),
+        'bullets': pygame.sprite.Group(),
+        'health_powerups': pygame.sprite.Group(),
+        'bomb_powerups': pygame.sprite.Group(),
+    }
+    for _ in range(count):
+        enemy = sr.Enemy(0, rng)
+        enemy.rect.topleft = (rng.randint(340, 940), rng.randint(100, 500))
+        scene['enemies'].add(enemy)
+    for _ in range(max(10, count // 5)):
+        scene['bullets'].add(sr.Bullet(rng.randint(340, 1000), rng.randint(100, 700)))
+    for _ in range(3):
+        scene['health_powerups'].add(sr.HealthPowerup(rng))
+        scene['bomb_powerups'].add(sr.BombPowerup(rng))
+    scene['players'] = [sr.Player(0, start_pos=(600, 520)), sr.Player(1, start_pos=(700, 400))]
+    return scene
+
+# Mesmas chamadas de GameState.step (sem matar sprites entre repetições)
+def grid_frame(grid, scene):
+    grid.build(scene['enemies'], scene['health_powerups'], scene['bomb_powerups'])
+    hits = [list(grid.groupcollide(scene['enemies'], scene['bullets'], False, True).items())]
+    for player in scene['players']:
+        for group in ('enemies', 'health_powerups', 'bomb_powerups'):
+            hits.append(grid.collide(player, scene[group]))
+    return hits
+
+def pygame_frame(scene):
+    hits = [list(pygame.sprite.groupcollide(scene['enemies'], scene['bullets'], False, True).items())]
+    for player in scene['players']:
+        for group in ('enemies', 'health_powerups', 'bomb_powerups'):
+            hits.append(pygame.sprite.spritecollide(player, scene[group], False))
+    return hits
+
+# Tempo médio em ms; os tiros voltam (na mesma ordem) antes de cada repetição
+def measure(frame, scene, repeat):
+    bullets = scene['bullets'].sprites()
+    total = 0.0
+    for _ in range(repeat):
+        scene['bullets'].empty()
+        scene['bullets'].add(bullets)
+        start = time.perf_counter()
+        hits = frame(scene)
+        total += time.perf_counter() - start
+    scene['bullets'].empty()
+    scene['bullets'].add(bullets)
+    return total / repeat * 1000, hits
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Colisões: SpatialHash contra pygame.sprite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="números de inimigos")
+    parser.add_argument("--repeat", type=int, default=20, help="repetições por tamanho")
+    args = parser.parse_args(argv)
+
+    grid = sr.SpatialHash()
+    same = True
+    print(f"{'inimigos':>8} {'grade ms':>10} {'pygame ms':>10} {'ganho':>7}")
+    for count in args.sizes:
+        scene = make_scene(count)
+        grid_ms, grid_hits = measure(lambda scene: grid_frame(grid, scene), scene, args.repeat)
+        pygame_ms, pygame_hits = measure(pygame_frame, scene, args.repeat)
+        same = same and grid_hits == pygame_hits
+        print(f"{count:>8} {grid_ms:>10.3f} {pygame_ms:>10.3f} {pygame_ms / grid_ms:>6.1f}x")
+    print("mesmos acertos" if same else "ACERTOS DIFERENTES")
+    return 0 if same else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+# Benchmarks do Space Raiders
+#
+# Roda o jogo sem janela (driver de vídeo "dummy" do SDL) em cenários de
+# estresse e mede frames por segundo, tempo de frame, Surfaces alocadas e pico
+# de memória. Os resultados podem ser salvos como baseline e comparados depois:
+#
+#   python benchmarks/run.py --save baseline.json
+#   python benchmarks/run.py --compare baseline.json
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # as sprites são carregadas com caminhos relativos
+
+import pygame
+import spaceraiders as sr
+
+SEED = 1234
+# Renderização usada nos cenários de jogo (ver spaceraiders.Renderer)
+RENDER_MODE = "full"
+# Inimigos e tiros em arrays (ver spaceraiders.EntityStore)
+ENTITY_STORE = False
+
+# Cada cenário recebe a tela e devolve a função que atualiza, desenha e
+# envia um frame para a tela (nos cenários de jogo, com o Renderer usado em
+# frame.renderer)
+
+def idle_starfield(screen):
+    stars = sr.Starfield(seed=SEED)
+    def frame(n):
+        screen.fill(sr.BLACK)
+        stars.update()
+        stars.draw(screen)
+        pygame.display.flip()
+    return frame
+
+# Dois jogadores atirando sem parar (o tiro precisa ser solto para repetir)
+def two_players_firing(screen):
+    state = sr.GameState(0, 1, seed=SEED, entity_store=ENTITY_STORE)
+    stars = sr.Starfield(seed=SEED)
+    hud = sr.HUD()
+    renderer = sr.Renderer(screen, RENDER_MODE)
+    def frame(n):
+        shoot = sr.INPUT_SHOOT if n % 2 == 0 else 0
+        move = sr.INPUT_LEFT if (n // 60) % 2 else sr.INPUT_RIGHT
+        stars.update()
+        state.step([shoot | move, shoot | move])
+        renderer.render(state, stars, hud)
+    frame.renderer = renderer
+    return frame
+
+def many_enemies(screen, count=500):
+    state = sr.GameState(0, seed=SEED, entity_store=ENTITY_STORE)
+    while len(state.enemies) < count:
+        state.spawn_enemy()
+    stars = sr.Starfield(seed=SEED)
+    hud = sr.HUD()
+    renderer = sr.Renderer(screen, RENDER_MODE)
+    def frame(n):
+        stars.update()
+        state.step([sr.INPUT_SHOOT if n % 2 == 0 else 0])
+        renderer.render(state, stars, hud)
+    frame.renderer = renderer
+    return frame
+
+# Coloca uma bomba em cima do jogador a cada 30 frames
+def repeated_bombs(screen):
+    state = sr.GameState(0, seed=SEED, entity_store=ENTITY_STORE)
+    stars = sr.Starfield(seed=SEED)
+    hud = sr.HUD()
+    renderer = sr.Renderer(screen, RENDER_MODE)
+    def frame(n):
+        if n % 30 == 0:
+            bomb = sr.BombPowerup(state.rng)
+            bomb.rect.center = state.player1.rect.center
+            bomb.speed = 0
+            state.all_sprites.add(bomb)
+            state.bomb_powerups.add(bomb)
+        stars.update()
+        state.step([0])
+        renderer.render(state, stars, hud)
+    frame.renderer = renderer
+    return frame
+
+# Uma onda de 500 inimigos em grade a cada 300 frames, que nasce aos poucos
+# pelo limite de spawns por frame
+def wave_burst(screen):
+    waves = sr.default_wave_config()
+    waves['waves'] = [{'frame': 1, 'count': 500, 'formation': 'grid', 'columns': 20, 'spacing': 40,
+                       'repeat': 300, 'times': -1}]
+    state = sr.GameState(0, seed=SEED, entity_store=ENTITY_STORE, waves=waves)
+    stars = sr.Starfield(seed=SEED)
+    hud = sr.HUD()
+    renderer = sr.Renderer(screen, RENDER_MODE)
+    def frame(n):
+        stars.update()
+        state.step([sr.INPUT_SHOOT if n % 2 == 0 else 0])
+        renderer.render(state, stars, hud)
+    frame.renderer = renderer
+    return frame
+
+# Alterna entre as telas de menu e de game over
+def menu_screens(screen):
+    stars = sr.Starfield(seed=SEED)
+    score_text = sr.get_font(60).render("Score: 42", True, sr.WHITE)
+    def frame(n):
+        screen_index = (n // 60) % 3
+        if screen_index == 0:
+            sr.draw_num_players_menu(screen, 1 + (n // 20) % 2)
+        elif screen_index == 1:
+            sr.draw_ship_menu(screen, 2, (n // 20) % len(sr.ship_sprites), [0])
+        else:
+            screen.fill(sr.BLACK)
+            stars.update()
+            stars.draw(screen)
+            sr.draw_game_over(screen, score_text)
+        pygame.display.flip()
+    return frame
+
+SCENARIOS = {
+    'idle_starfield': idle_starfield,
+    'two_players_firing': two_players_firing,
+    'many_enemies': many_enemies,
+    'repeated_bombs': repeated_bombs,
+    'wave_burst': wave_burst,
+    'menu_screens': menu_screens,
+}
+
+# Métricas onde um valor maior é melhor (nas outras, menor é melhor)
+HIGHER_IS_BETTER = {'fps'}
+
+def run_scenario(name, frames):
+    screen = pygame.display.get_surface()
+    frame = SCENARIOS[name](screen)
+    # Passada de tempo (sem tracemalloc, que deixa tudo mais lento)
+    times = []
+    surfaces = 0
+    sr.reset_frame_allocs()
+    start = time.perf_counter()
+    for n in range(frames):
+        frame_start = time.perf_counter()
+        frame(n)
+        pygame.event.pump()
+        times.append(time.perf_counter() - frame_start)
+        surfaces += sr.reset_frame_allocs()['surfaces']
+    elapsed = time.perf_counter() - start
+    times.sort()
+    renderer = getattr(frame, 'renderer', None)
+    # Passada de memória, mais curta, num cenário novo
+    frame = SCENARIOS[name](screen)
+    tracemalloc.start()
+    for n in range(max(1, frames // 5)):
+        frame(n)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    metrics = {
+        'frames': frames,
+        'fps': frames / elapsed,
+        'frame_ms_p50': times[len(times) // 2] * 1000,
+        'frame_ms_p95': times[int(len(times) * 0.95)] * 1000,
+        'surfaces_per_frame': surfaces / frames,
+        'peak_kb': peak / 1024,
+    }
+    # Quantos frames enviaram a tela inteira (no modo dirty, os que caíram
+    # no fallback por área suja grande demais)
+    if renderer:
+        metrics['full_flips'] = renderer.full_flips
+        metrics['dirty_updates'] = renderer.dirty_updates
+    return metrics
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric, value in metrics.items():
+            old = baseline[name].get(metric)
+            if metric == 'frames' or not old:
+                continue
+            change = (value - old) / old * 100
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "  REGRESSÃO" if worse > threshold else ""
+            print(f"  {name:<20} {metric:<20} {old:>10.2f} -> {value:>10.2f} ({change:+.1f}%){flag}")
+            if flag:
+                regressions.append((name, metric))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do Space Raiders")
+    parser.add_argument("scenarios", nargs="*", help="cenários a rodar (padrão: todos): " + ", ".join(SCENARIOS))
+    parser.add_argument("--frames", type=int, default=600, help="frames por cenário")
+    parser.add_argument("--render", choices=sr.RENDER_MODES, default="full", help="renderização dos cenários de jogo")
+    parser.add_argument("--entity-store", action="store_true", help="inimigos e tiros em arrays NumPy")
+    parser.add_argument("--save", metavar="ARQUIVO", help="salva os resultados como baseline (JSON)")
+    parser.add_argument("--compare", metavar="ARQUIVO", help="compara com um baseline salvo")
+    parser.add_argument("--threshold", type=float, default=10.0, help="piora máxima aceita na comparação, em %%")
+    args = parser.parse_args(argv)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"cenário desconhecido: {name}")
+    global RENDER_MODE, ENTITY_STORE
+    RENDER_MODE = args.render
+    ENTITY_STORE = args.entity_store
+
+    results = {}
+    for name in args.scenarios or SCENARIOS:
+        metrics = run_scenario(name, args.frames)
+        results[name] = metrics
+        print(f"{name:<20} {metrics['fps']:>8.1f} fps  p50 {metrics['frame_ms_p50']:.2f} ms  "
+              f"p95 {metrics['frame_ms_p95']:.2f} ms  {metrics['surfaces_per_frame']:.2f} surfaces/frame  "
+              f"pico {metrics['peak_kb']:.0f} KB" +
+              (f"  telas inteiras {metrics['full_flips']}/{metrics['full_flips'] + metrics['dirty_updates']}"
+               if 'full_flips' in metrics else ""))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Comparação com {args.compare}:")
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
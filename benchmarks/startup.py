@@ -0,0 +1,54 @@
+# Tempo de inicialização e memória do Space Raiders
+#
+# Importa o jogo em processos novos (driver de vídeo "dummy") e mede o tempo
+# até as sprites ficarem prontas e o pico de memória residente (RSS),
+# carregando dos PNGs soltos e do pacote gerado por build_assets.py:
+#
+#   python benchmarks/startup.py
+#   python benchmarks/startup.py --runs 20
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código rodado em cada processo
+PROBE = """
+import json, resource, spaceraiders as sr
+print(json.dumps({'assets_ms': sr.startup_times['assets_ready'],
+                  'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  'pack': sr.asset_pack is not None}))
+"""
+
+def probe(pack):
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SPACERAIDERS_PACK=pack,
+               PYGAME_HIDE_SUPPORT_PROMPT="1")
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inicialização do Space Raiders: PNGs soltos x pacote")
+    parser.add_argument("--runs", type=int, default=10, help="processos por modo")
+    parser.add_argument("--pack", default="assets.pack", help="pacote gerado por build_assets.py")
+    args = parser.parse_args(argv)
+    if not os.path.exists(os.path.join(ROOT, args.pack)):
+        subprocess.run([sys.executable, os.path.join(ROOT, "build_assets.py"), "--out", args.pack],
+                       cwd=ROOT, check=True)
+
+    for label, pack in (("PNGs", ""), ("pacote", args.pack)):
+        runs = [probe(pack) for _ in range(args.runs)]
+        if pack and not all(run['pack'] for run in runs):
+            print(f"{label}: o pacote não foi usado (desatualizado? rode build_assets.py)")
+            continue
+        assets = statistics.median(run['assets_ms'] for run in runs)
+        rss = statistics.median(run['rss_kb'] for run in runs)
+        print(f"{label:<8} sprites prontas em {assets:7.1f} ms (mediana)  RSS máximo {rss / 1024:6.1f} MB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+# Gera o pacote de sprites do Space Raiders (assets.pack)
+#
+# Carrega os PNGs de ships/, health/, powerups/ e projectiles/, aplica as
+# escalas e rotações que o jogo usa e grava tudo em pixels crus num único
+# arquivo com índice, que o jogo mapeia na memória na inicialização. Rode de
+# novo depois de mudar alguma imagem (o jogo ignora um pacote mais velho que
+# os PNGs).
+#
+#   python build_assets.py
+#   python build_assets.py --out outro.pack
+
+import os
+import sys
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ["SPACERAIDERS_PACK"] = ""  # as sprites vêm dos PNGs, não de um pacote antigo
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # as sprites são carregadas com caminhos relativos
+
+import spaceraiders as sr
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera o pacote de sprites do Space Raiders")
+    parser.add_argument("--out", default=sr.DEFAULT_ASSET_PACK, help="arquivo do pacote")
+    args = parser.parse_args(argv)
+    sprites = [(key, sr.get_sprite(*key)) for key in sr.pack_sprite_keys()]
+    sr.write_asset_pack(args.out, sprites)
+    print(f"{len(sprites)} sprites, {os.path.getsize(args.out) / 1024:.1f} KB em {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
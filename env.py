@@ -0,0 +1,317 @@
+# Ambiente de aprendizado por reforço do Space Raiders
+#
+# Interface no estilo Gym: reset() devolve (observação, info) e step(ação)
+# devolve (observação, recompensa, terminou, truncou, info). O jogo roda sem
+# janela (driver de vídeo "dummy" do SDL) direto no GameState, com as mesmas
+# regras de main(): movimento e tiro das naves, inimigos que voltam ao topo,
+# power-ups e pontuação.
+#
+# A ação são os bits de input do jogador 1 (INPUT_LEFT | INPUT_SHOOT, ...),
+# um inteiro de 0 a ACTIONS - 1. A recompensa é o aumento da pontuação menos
+# damage_penalty por vida perdida. A observação pode ser:
+#   "entities": array float32 (1 + max_entities, 4). A linha 0 é a nave
+#               (x, y, vida, invulnerável) e as outras são as entidades mais
+#               próximas dela (tipo, x, y, velocidade), com posições
+#               normalizadas pela tela; linhas sem entidade ficam zeradas.
+#   "pixels":   a tela em tons de cinza reduzida para PIXELS_SIZE (uint8,
+#               altura x largura), sem estrelas nem HUD.
+#
+# VectorEnv roda N partidas com um step() só; SubprocVectorEnv divide as
+# partidas entre processos, que escrevem as observações direto num buffer de
+# memória compartilhada.
+#
+#   python env.py --envs 16 --steps 2000 --workers 4
+
+import os
+import sys
+import time
+import random
+import argparse
+import multiprocessing
+from multiprocessing import shared_memory
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # as sprites são carregadas com caminhos relativos
+
+import numpy as np
+import pygame
+import spaceraiders as sr
+
+ACTIONS = 32  # todas as combinações dos 5 bits de input
+OBSERVATIONS = ['entities', 'pixels']
+MAX_ENTITIES = 32
+PIXELS_SIZE = (128, 72)  # largura, altura
+# Código de cada tipo de entidade na observação "entities"
+ENTITY_KINDS = {'enemies': 1, 'health_powerups': 2, 'bomb_powerups': 3, 'bullets': 4}
+ENTITY_SPEED_SCALE = 10.0
+
+class SpaceRaidersEnv:
+    def __init__(self, ship=0, seed=None, observation="entities", max_entities=MAX_ENTITIES,
+                 max_frames=18000, frame_skip=1, damage_penalty=1.0, entity_store=True, waves=None):
+        if observation not in OBSERVATIONS:
+            raise ValueError(f"observação desconhecida: {observation}")
+        self.ship = ship
+        self.observation = observation
+        self.max_entities = max_entities
+        self.max_frames = max_frames
+        self.frame_skip = frame_skip
+        self.damage_penalty = damage_penalty
+        self.entity_store = entity_store and sr.np is not None
+        self.waves = waves
+        # Sementes das partidas: cada reset() sem semente usa a próxima
+        self.seeds = random.Random(seed)
+        self.state = None
+        if observation == "entities":
+            self.observation_shape = (1 + max_entities, 4)
+            self.observation_dtype = np.float32
+        else:
+            self.observation_shape = (PIXELS_SIZE[1], PIXELS_SIZE[0])
+            self.observation_dtype = np.uint8
+            self.canvas = pygame.Surface((sr.WIDTH, sr.HEIGHT)).convert()
+            self.small = pygame.Surface(PIXELS_SIZE).convert()
+
+    def reset(self, seed=None):
+        if seed is None:
+            seed = self.seeds.getrandbits(64)
+        self.state = sr.GameState(self.ship, seed=seed, entity_store=self.entity_store, waves=self.waves)
+        return self.observe(), self.info()
+
+    # out (opcional) recebe a observação, sem alocar um array novo
+    def step(self, action, out=None):
+        state = self.state
+        player = state.player1
+        score = state.score
+        health = player.health
+        for _ in range(self.frame_skip):
+            state.step([int(action)])
+            if state.all_dead():
+                break
+        reward = state.score - score - self.damage_penalty * max(0, health - player.health)
+        terminated = state.all_dead()
+        truncated = not terminated and state.frame >= self.max_frames
+        return self.observe(out), float(reward), terminated, truncated, self.info()
+
+    def info(self):
+        return {'score': self.state.score, 'frame': self.state.frame,
+                'health': self.state.player1.health, 'seed': self.state.seed}
+
+    # Escreve a observação em out (um array do formato observation_shape)
+    # ou num array novo
+    def observe(self, out=None):
+        if out is None:
+            out = np.zeros(self.observation_shape, self.observation_dtype)
+        if self.observation == "entities":
+            self.observe_entities(out)
+        else:
+            self.observe_pixels(out)
+        return out
+
+    def observe_entities(self, out):
+        state = self.state
+        player = state.player1
+        px, py = player.rect.center
+        out[0] = (px / sr.WIDTH, py / sr.HEIGHT, player.health / player.max_health, player.invulnerable_timer > 0)
+        columns = [self.entity_columns(getattr(state, name), kind) for name, kind in ENTITY_KINDS.items()]
+        entities = np.concatenate(columns)
+        # As mais próximas da nave primeiro
+        distance = (entities[:, 1] - px) ** 2 + (entities[:, 2] - py) ** 2
+        nearest = entities[np.argsort(distance, kind="stable")[:self.max_entities]]
+        count = len(nearest)
+        nearest[:, 1] /= sr.WIDTH
+        nearest[:, 2] /= sr.HEIGHT
+        nearest[:, 3] /= ENTITY_SPEED_SCALE
+        out[1:1 + count] = nearest
+        out[1 + count:] = 0
+
+    # Colunas (tipo, centro x, centro y, velocidade) de um grupo ou EntityStore
+    @staticmethod
+    def entity_columns(group, kind):
+        if isinstance(group, sr.EntityStore):
+            slots = group.active()
+            columns = np.empty((len(slots), 4), np.float32)
+            columns[:, 1] = group.x[slots] + group.width / 2
+            columns[:, 2] = group.y[slots] + group.height / 2
+            columns[:, 3] = group.speed[slots]
+        else:
+            columns = np.array([(0, *sprite.rect.center, getattr(sprite, 'speed', 0)) for sprite in group],
+                               np.float32).reshape(-1, 4)
+        columns[:, 0] = kind
+        return columns
+
+    def observe_pixels(self, out):
+        self.canvas.fill(sr.BLACK)
+        for layer in self.state.draw_layers():
+            self.canvas.blits(sr.blit_sequence(layer), False)
+        pygame.transform.scale(self.canvas, PIXELS_SIZE, self.small)
+        rgb = pygame.surfarray.pixels3d(self.small)
+        # surfarray é (largura, altura); a observação é (altura, largura)
+        out[:] = (rgb.sum(axis=2) // 3).T
+        del rgb
+
+    def close(self):
+        self.state = None
+
+# N partidas no mesmo processo. Uma partida que termina recomeça sozinha; a
+# última observação dela fica em info['final_observation'].
+class VectorEnv:
+    def __init__(self, num_envs, seed=0, **kwargs):
+        self.envs = [SpaceRaidersEnv(seed=seed + idx, **kwargs) for idx in range(num_envs)]
+        self.num_envs = num_envs
+        env = self.envs[0]
+        self.observation_shape = (num_envs,) + env.observation_shape
+        self.observations = np.zeros(self.observation_shape, env.observation_dtype)
+
+    def reset(self):
+        infos = []
+        for idx, env in enumerate(self.envs):
+            infos.append(env.reset()[1])
+            env.observe(self.observations[idx])
+        return self.observations.copy(), infos
+
+    def step(self, actions):
+        rewards, terminated, truncated, infos = step_envs(self.envs, actions, self.observations)
+        return self.observations.copy(), rewards, terminated, truncated, infos
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+
+# Passo de várias partidas escrevendo as observações em observations
+def step_envs(envs, actions, observations):
+    rewards = np.zeros(len(envs), np.float32)
+    terminated = np.zeros(len(envs), bool)
+    truncated = np.zeros(len(envs), bool)
+    infos = []
+    for idx, env in enumerate(envs):
+        observation, rewards[idx], terminated[idx], truncated[idx], info = env.step(actions[idx], observations[idx])
+        if terminated[idx] or truncated[idx]:
+            final_observation, final_info = observation.copy(), info
+            observations[idx], info = env.reset()
+            info['final_observation'] = final_observation
+            info['final_info'] = final_info
+        infos.append(info)
+    return rewards, terminated, truncated, infos
+
+# Processo de SubprocVectorEnv: cuida das partidas first..first+count e
+# escreve as observações nas linhas delas no buffer compartilhado
+def worker(pipe, shm_name, shape, dtype, first, count, seed, kwargs):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    observations = np.ndarray(shape, dtype, buffer=shm.buf)[first:first + count]
+    envs = [SpaceRaidersEnv(seed=seed + first + idx, **kwargs) for idx in range(count)]
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == 'reset':
+                infos = []
+                for idx, env in enumerate(envs):
+                    infos.append(env.reset()[1])
+                    env.observe(observations[idx])
+                pipe.send(infos)
+            elif command == 'step':
+                pipe.send(step_envs(envs, data, observations))
+            else:
+                break
+    finally:
+        del observations
+        shm.close()
+        pipe.close()
+
+# Como VectorEnv, mas com as partidas divididas entre workers processos
+class SubprocVectorEnv:
+    def __init__(self, num_envs, workers=None, seed=0, **kwargs):
+        workers = min(num_envs, workers or os.cpu_count() or 1)
+        probe = SpaceRaidersEnv(**kwargs)
+        self.num_envs = num_envs
+        self.observation_shape = (num_envs,) + probe.observation_shape
+        dtype = np.dtype(probe.observation_dtype)
+        size = int(np.prod(self.observation_shape)) * dtype.itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        self.observations = np.ndarray(self.observation_shape, dtype, buffer=self.shm.buf)
+        self.slices = []
+        self.pipes = []
+        self.processes = []
+        per_worker, extra = divmod(num_envs, workers)
+        first = 0
+        for idx in range(workers):
+            count = per_worker + (idx < extra)
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=worker, daemon=True,
+                                              args=(child, self.shm.name, self.observation_shape, dtype,
+                                                    first, count, seed, kwargs))
+            process.start()
+            child.close()
+            self.slices.append(slice(first, first + count))
+            self.pipes.append(parent)
+            self.processes.append(process)
+            first += count
+
+    def reset(self):
+        for pipe in self.pipes:
+            pipe.send(('reset', None))
+        infos = [info for pipe in self.pipes for info in pipe.recv()]
+        return self.observations.copy(), infos
+
+    # Envia as ações para todos os processos antes de esperar as respostas
+    def step(self, actions):
+        for pipe, part in zip(self.pipes, self.slices):
+            pipe.send(('step', actions[part]))
+        results = [pipe.recv() for pipe in self.pipes]
+        rewards = np.concatenate([result[0] for result in results])
+        terminated = np.concatenate([result[1] for result in results])
+        truncated = np.concatenate([result[2] for result in results])
+        infos = [info for result in results for info in result[3]]
+        return self.observations.copy(), rewards, terminated, truncated, infos
+
+    def close(self):
+        if not self.pipes:
+            return
+        for pipe in self.pipes:
+            pipe.send(('close', None))
+        for process in self.processes:
+            process.join()
+        self.pipes = []
+        del self.observations
+        self.shm.close()
+        self.shm.unlink()
+
+# Mede passos por segundo com ações aleatórias
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ambiente de aprendizado por reforço do Space Raiders")
+    parser.add_argument("--envs", type=int, default=8, help="partidas em paralelo")
+    parser.add_argument("--steps", type=int, default=1000, help="passos de cada partida")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processos (0: todas as partidas no processo atual)")
+    parser.add_argument("--observation", choices=OBSERVATIONS, default="entities")
+    parser.add_argument("--frame-skip", type=int, default=1, help="frames por ação")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    kwargs = {'observation': args.observation, 'frame_skip': args.frame_skip}
+    if args.workers:
+        envs = SubprocVectorEnv(args.envs, args.workers, args.seed, **kwargs)
+    else:
+        envs = VectorEnv(args.envs, args.seed, **kwargs)
+    rng = np.random.default_rng(args.seed)
+    episodes = 0
+    total_reward = 0.0
+    try:
+        envs.reset()
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            actions = rng.integers(0, ACTIONS, args.envs)
+            observations, rewards, terminated, truncated, infos = envs.step(actions)
+            episodes += int(terminated.sum() + truncated.sum())
+            total_reward += float(rewards.sum())
+        elapsed = time.perf_counter() - start
+    finally:
+        envs.close()
+    steps = args.envs * args.steps
+    print(f"{steps} passos em {elapsed:.2f} s ({steps / elapsed:.0f} passos/s, "
+          f"{steps * args.frame_skip / elapsed:.0f} frames/s), {episodes} partidas terminadas, "
+          f"recompensa total {total_reward:.0f}, observação {envs.observation_shape}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
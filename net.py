@@ -0,0 +1,588 @@
+# Modo em rede do Space Raiders (UDP)
+#
+# O servidor roda a simulação oficial (GameState) sem janela e envia, a cada
+# frame, um snapshot de jogadores, inimigos, tiros, power-ups e explosões para
+# cada cliente. O snapshot é um delta em relação ao último que o cliente
+# confirmou: só vão as entidades novas ou removidas e, das que mudaram, só os
+# campos alterados. Os clientes mandam os bits de input de cada frame e movem a
+# própria nave na hora (previsão com Player.move); quando chega um snapshot, a
+# posição do servidor é aplicada e os inputs ainda não confirmados são
+# reaplicados por cima.
+#
+#   python net.py server --port 5555
+#   python net.py client --host 127.0.0.1 --port 5555
+#
+# O servidor mostra, por cliente, os bytes enviados por segundo e o tempo para
+# montar cada snapshot; o cliente mostra no título da janela os bytes
+# recebidos por segundo e o tempo para decodificar.
+
+import os
+import sys
+import time
+import socket
+import struct
+import zlib
+import argparse
+from collections import deque
+
+# O servidor roda sem janela
+if __name__ == "__main__" and sys.argv[1:2] == ["server"]:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # as sprites são carregadas com caminhos relativos
+
+import pygame
+import spaceraiders as sr
+
+DEFAULT_PORT = 5555
+HISTORY = 120           # snapshots guardados como base para os deltas
+INPUT_REDUNDANCY = 8    # cada pacote repete os últimos inputs (tolera perda)
+MAX_INPUT_BACKLOG = 4   # inputs atrasados demais no servidor são descartados
+TIMEOUT = 5.0           # segundos sem notícias do servidor
+FPS_WAIT = 20           # ritmo do servidor enquanto espera os jogadores
+
+# Pacotes: o primeiro byte diz o tipo
+JOIN = b"J"
+WELCOME = b"W"
+INPUT = b"I"
+SNAPSHOT = b"S"
+JOIN_FORMAT = struct.Struct("<cB")              # tipo, nave
+WELCOME_FORMAT = struct.Struct("<cBBBBQ")       # tipo, índice do jogador, jogadores, nave 1, nave 2, semente
+INPUT_HEADER = struct.Struct("<cIB")            # tipo, último snapshot recebido, quantidade de inputs
+INPUT_ENTRY = struct.Struct("<IB")              # número do input, bits
+SNAPSHOT_PREFIX = struct.Struct("<cB")          # tipo, flags (1 = compactado com zlib)
+SNAPSHOT_HEADER = struct.Struct("<IIIiB")       # snapshot, base do delta, último input aplicado, score, rodando
+SECTION = struct.Struct("<HH")                  # removidos, alterados
+RECORD = struct.Struct("<HB")                   # id, máscara dos campos enviados
+FIELD = struct.Struct("<h")
+COMPRESSED = 1
+
+# Campos de cada tipo de entidade, na ordem dos bits da máscara
+KINDS = {
+    'players': ('x', 'y', 'health', 'invulnerable', 'alive'),
+    'enemies': ('x', 'y', 'ship'),
+    'bullets': ('x', 'y'),
+    'health_powerups': ('x', 'y'),
+    'bomb_powerups': ('x', 'y'),
+    'explosions': ('x', 'y', 'frame'),
+}
+
+# Controles do jogador em cada cliente
+CONTROLS = {'left': pygame.K_LEFT, 'right': pygame.K_RIGHT, 'up': pygame.K_UP, 'down': pygame.K_DOWN,
+            'shoot': pygame.K_SPACE, 'select': [pygame.K_RETURN, pygame.K_SPACE]}
+
+# Ids de rede estáveis (16 bits) para os sprites de um grupo. Um sprite mantém
+# o id enquanto continuar no grupo; ids livres são reaproveitados.
+class EntityIds:
+    def __init__(self):
+        self.ids = {}
+        self.next_id = 1
+
+    def sync(self, sprites):
+        ids = {sprite: self.ids[sprite] for sprite in sprites if sprite in self.ids}
+        used = set(ids.values())
+        for sprite in sprites:
+            if sprite not in ids:
+                while self.next_id in used:
+                    self.next_id = self.next_id % 0xFFFF + 1
+                ids[sprite] = self.next_id
+                used.add(self.next_id)
+                self.next_id = self.next_id % 0xFFFF + 1
+        self.ids = ids
+        return ids
+
+# Snapshot do estado: para cada tipo, {id: valores dos campos}
+def capture(state, ids):
+    snapshot = {'players': {}}
+    for idx, player in enumerate(state.players):
+        snapshot['players'][idx] = (player.rect.x, player.rect.y, player.health,
+                                    player.invulnerable_timer, int(player.alive()))
+    for kind in ('enemies', 'bullets', 'health_powerups', 'bomb_powerups', 'explosions'):
+        group = getattr(state, kind)
+        entities = {}
+        for sprite, net_id in ids[kind].sync(group.sprites()).items():
+            if kind == 'enemies':
+                entities[net_id] = (sprite.rect.x, sprite.rect.y, sprite.ship_index)
+            elif kind == 'explosions':
+                entities[net_id] = (sprite.x, sprite.y, sprite.frame)
+            else:
+                entities[net_id] = (sprite.rect.x, sprite.rect.y)
+        snapshot[kind] = entities
+    return snapshot
+
+# Codifica o snapshot como delta em relação a baseline (None = completo)
+def encode_snapshot(snapshot_id, snapshot, baseline_id=0, baseline=None, ack=0, score=0, running=True):
+    parts = [SNAPSHOT_HEADER.pack(snapshot_id, baseline_id, ack, score, running)]
+    for kind in KINDS:
+        current = snapshot[kind]
+        base = baseline[kind] if baseline else {}
+        removed = [net_id for net_id in base if net_id not in current]
+        changed = []
+        for net_id, values in current.items():
+            old = base.get(net_id)
+            mask = 0
+            fields = []
+            for bit, value in enumerate(values):
+                if old is None or old[bit] != value:
+                    mask |= 1 << bit
+                    fields.append(value)
+            if mask:
+                changed.append(RECORD.pack(net_id, mask) + struct.pack(f"<{len(fields)}h", *fields))
+        parts.append(SECTION.pack(len(removed), len(changed)))
+        parts.append(struct.pack(f"<{len(removed)}H", *removed))
+        parts.extend(changed)
+    payload = b"".join(parts)
+    compressed = zlib.compress(payload, 1)
+    if len(compressed) < len(payload):
+        return SNAPSHOT_PREFIX.pack(SNAPSHOT, COMPRESSED) + compressed
+    return SNAPSHOT_PREFIX.pack(SNAPSHOT, 0) + payload
+
+# Tira do histórico todos os snapshots com número <= newest - HISTORY (com
+# perda ou pacotes fora de ordem, o número exato que sai nem sempre chegou)
+def prune_history(history, newest):
+    oldest = newest - HISTORY
+    for snapshot_id in [key for key in history if key <= oldest]:
+        del history[snapshot_id]
+
+# Decodifica um pacote de snapshot. history guarda os snapshots já recebidos
+# (a base do delta); devolve None se a base não estiver lá.
+def decode_snapshot(data, history):
+    _, flags = SNAPSHOT_PREFIX.unpack_from(data)
+    payload = data[SNAPSHOT_PREFIX.size:]
+    if flags & COMPRESSED:
+        payload = zlib.decompress(payload)
+    header = SNAPSHOT_HEADER.unpack_from(payload)
+    baseline_id = header[1]
+    baseline = None
+    if baseline_id:
+        baseline = history.get(baseline_id)
+        if baseline is None:
+            return None
+    offset = SNAPSHOT_HEADER.size
+    snapshot = {}
+    for kind, fields in KINDS.items():
+        entities = dict(baseline[kind]) if baseline else {}
+        removed, changed = SECTION.unpack_from(payload, offset)
+        offset += SECTION.size
+        for net_id in struct.unpack_from(f"<{removed}H", payload, offset):
+            del entities[net_id]
+        offset += removed * 2
+        for _ in range(changed):
+            net_id, mask = RECORD.unpack_from(payload, offset)
+            offset += RECORD.size
+            values = list(entities.get(net_id, (0,) * len(fields)))
+            for bit in range(len(fields)):
+                if mask & (1 << bit):
+                    values[bit], = FIELD.unpack_from(payload, offset)
+                    offset += FIELD.size
+            entities[net_id] = tuple(values)
+        snapshot[kind] = entities
+    return header, snapshot
+
+# Bytes e tempos por janela de um segundo
+class NetStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.bytes = 0
+        self.packets = 0
+        self.seconds = 0.0
+        self.total_bytes = 0
+        self.total_packets = 0
+        self.total_seconds = 0.0
+        self.last = (0.0, 0.0, 0.0)  # bytes/s, bytes/pacote, µs/pacote
+
+    def add(self, size, seconds):
+        self.bytes += size
+        self.packets += 1
+        self.seconds += seconds
+        self.total_bytes += size
+        self.total_packets += 1
+        self.total_seconds += seconds
+
+    # Fecha a janela se já passou um segundo; devolve True quando fechou
+    def tick(self):
+        elapsed = time.perf_counter() - self.start
+        if elapsed < 1.0:
+            return False
+        packets = max(self.packets, 1)
+        self.last = (self.bytes / elapsed, self.bytes / packets, self.seconds / packets * 1e6)
+        self.start += elapsed
+        self.bytes = self.packets = 0
+        self.seconds = 0.0
+        return True
+
+    def summary(self):
+        packets = max(self.total_packets, 1)
+        return self.total_bytes / packets, self.total_seconds / packets * 1e6
+
+# Cliente visto pelo servidor
+class RemoteClient:
+    def __init__(self, address, ship):
+        self.address = address
+        self.ship = ship
+        self.inputs = {}       # número do input -> bits, ainda não aplicados
+        self.next_seq = 1
+        self.bits = 0
+        self.ack = 0           # último input aplicado
+        self.acked = 0         # último snapshot que o cliente recebeu
+        self.stats = NetStats()
+
+    def receive_inputs(self, acked, entries):
+        self.acked = max(self.acked, acked)
+        for seq, bits in entries:
+            if seq >= self.next_seq:
+                self.inputs[seq] = bits
+
+    # Input do frame atual. Se um input se perdeu, pula para o próximo que
+    # chegou; se acumularam demais, descarta os mais antigos.
+    def next_input(self):
+        if self.inputs:
+            if len(self.inputs) > MAX_INPUT_BACKLOG:
+                for seq in sorted(self.inputs)[:-MAX_INPUT_BACKLOG]:
+                    del self.inputs[seq]
+            if self.next_seq not in self.inputs:
+                self.next_seq = min(self.inputs)
+            self.bits = self.inputs.pop(self.next_seq)
+            self.ack = self.next_seq
+            self.next_seq += 1
+        return self.bits
+
+class Server:
+    def __init__(self, host="0.0.0.0", port=DEFAULT_PORT, num_players=2, seed=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.num_players = num_players
+        self.seed = seed
+        self.clients = []
+        self.state = None
+        self.ids = {kind: EntityIds() for kind in KINDS if kind != 'players'}
+        self.history = {}
+
+    def client(self, address):
+        for client in self.clients:
+            if client.address == address:
+                return client
+        return None
+
+    def receive(self):
+        while True:
+            try:
+                data, address = self.sock.recvfrom(65536)
+            except (BlockingIOError, ConnectionResetError):
+                return
+            kind = data[:1]
+            client = self.client(address)
+            if kind == JOIN:
+                _, ship = JOIN_FORMAT.unpack_from(data)
+                if client is None and self.state is None and len(self.clients) < self.num_players:
+                    client = RemoteClient(address, ship)
+                    self.clients.append(client)
+                    print(f"jogador {len(self.clients)} entrou: {address[0]}:{address[1]}")
+                if client and self.state:
+                    self.welcome(client)
+            elif kind == INPUT and client:
+                _, acked, count = INPUT_HEADER.unpack_from(data)
+                entries = [INPUT_ENTRY.unpack_from(data, INPUT_HEADER.size + i * INPUT_ENTRY.size)
+                           for i in range(count)]
+                client.receive_inputs(acked, entries)
+
+    def welcome(self, client):
+        ships = [c.ship for c in self.clients] + [sr.NO_SHIP]
+        packet = WELCOME_FORMAT.pack(WELCOME, self.clients.index(client), self.num_players,
+                                     ships[0], ships[1], self.state.seed)
+        self.sock.sendto(packet, client.address)
+
+    def start(self):
+        ships = [client.ship for client in self.clients]
+        self.state = sr.GameState(ships[0], ships[1] if self.num_players == 2 else None, seed=self.seed)
+        for client in self.clients:
+            self.welcome(client)
+
+    # Avança um frame e envia os snapshots
+    def tick(self):
+        state = self.state
+        if state.running:
+            state.step([client.next_input() for client in self.clients])
+        snapshot = capture(state, self.ids)
+        self.history[state.frame] = snapshot
+        prune_history(self.history, state.frame)
+        for client in self.clients:
+            start = time.perf_counter()
+            baseline_id = client.acked if client.acked in self.history else 0
+            packet = encode_snapshot(state.frame, snapshot, baseline_id, self.history.get(baseline_id),
+                                     client.ack, state.score, state.running)
+            client.stats.add(len(packet), time.perf_counter() - start)
+            self.sock.sendto(packet, client.address)
+
+    def report(self):
+        for idx, client in enumerate(self.clients):
+            if client.stats.tick():
+                rate, size, encode = client.stats.last
+                print(f"jogador {idx + 1}: {rate / 1024:.1f} KB/s, {size:.0f} B/snapshot, encode {encode:.0f} µs")
+
+    # Ctrl+C / SIGTERM chegam como pygame.QUIT
+    def stopped(self):
+        return any(event.type == pygame.QUIT for event in pygame.event.get())
+
+    def run(self):
+        print(f"aguardando {self.num_players} jogador(es) na porta {self.sock.getsockname()[1]}...")
+        while len(self.clients) < self.num_players:
+            sr.clock.tick(FPS_WAIT)
+            if self.stopped():
+                self.sock.close()
+                return
+            self.receive()
+        self.start()
+        while self.state.running:
+            sr.clock.tick(sr.FPS)
+            if self.stopped():
+                self.state.running = False
+            self.receive()
+            self.tick()
+            self.report()
+        # Continua mandando o snapshot final por um segundo (UDP pode perder)
+        for _ in range(sr.FPS):
+            sr.clock.tick(sr.FPS)
+            self.receive()
+            self.tick()
+        print(f"fim de jogo: score {self.state.score} em {self.state.frame} frames")
+        for idx, client in enumerate(self.clients):
+            size, encode = client.stats.summary()
+            print(f"jogador {idx + 1}: média {size:.0f} B/snapshot, encode {encode:.0f} µs")
+        self.sock.close()
+
+# Conexão do cliente com o servidor
+class Client:
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, ship=0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.server = (host, port)
+        self.ship = ship
+        self.welcome = None
+        self.history = {}
+        self.latest = 0
+        self.seq = 0
+        self.pending = deque(maxlen=HISTORY)   # (número, bits) ainda não confirmados
+        self.last_packet = time.perf_counter()
+        self.download = NetStats()
+        self.decode = NetStats()
+
+    def join(self):
+        self.sock.sendto(JOIN_FORMAT.pack(JOIN, self.ship), self.server)
+
+    # Lê os pacotes que chegaram; devolve o snapshot mais novo (ou None)
+    def poll(self):
+        newest = None
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(65536)
+            except (BlockingIOError, ConnectionResetError):
+                break
+            self.last_packet = time.perf_counter()
+            kind = data[:1]
+            if kind == WELCOME:
+                self.welcome = WELCOME_FORMAT.unpack(data)[1:]
+            elif kind == SNAPSHOT:
+                start = time.perf_counter()
+                decoded = decode_snapshot(data, self.history)
+                seconds = time.perf_counter() - start
+                self.download.add(len(data), 0.0)
+                if decoded is None:
+                    continue
+                self.decode.add(len(data), seconds)
+                header, snapshot = decoded
+                snapshot_id = header[0]
+                if snapshot_id > self.latest:
+                    self.latest = snapshot_id
+                    newest = decoded
+                self.history[snapshot_id] = snapshot
+                prune_history(self.history, self.latest)
+        if newest:
+            ack = newest[0][2]
+            while self.pending and self.pending[0][0] <= ack:
+                self.pending.popleft()
+        return newest
+
+    def send_input(self, bits):
+        self.seq += 1
+        self.pending.append((self.seq, bits))
+        entries = list(self.pending)[-INPUT_REDUNDANCY:]
+        packet = INPUT_HEADER.pack(INPUT, self.latest, len(entries))
+        packet += b"".join(INPUT_ENTRY.pack(seq, entry_bits) for seq, entry_bits in entries)
+        self.sock.sendto(packet, self.server)
+
+    def timed_out(self):
+        return time.perf_counter() - self.last_packet > TIMEOUT
+
+# Sprite só para desenho, com a posição vinda do servidor
+class NetSprite(pygame.sprite.Sprite):
+    def __init__(self, image):
+        super().__init__()
+        self.image = image
+        self.rect = image.get_rect()
+
+# O que o cliente desenha: mesma interface de GameState usada por draw_game
+# e Renderer (players, score, draw_layers)
+class NetView:
+    def __init__(self, welcome):
+        self.index, self.num_players, ship1, ship2, self.seed = welcome
+        ships = [ship1, ship2][:self.num_players]
+        starts = [sr.PLAYER1_START, sr.PLAYER2_START]
+        self.players = [sr.Player(ship, start_pos=starts[idx]) for idx, ship in enumerate(ships)]
+        self.local = self.players[self.index]
+        self.score = 0
+        self.running = True
+        self.all_sprites = pygame.sprite.Group(self.players)
+        self.explosions = pygame.sprite.Group()
+        self.sprites = {kind: {} for kind in KINDS if kind != 'players'}
+        self.bullet_image = sr.get_sprite('projectile', (12, 12))
+        self.health_image = sr.get_sprite('health', (64, 64))
+        self.bomb_image = sr.get_sprite('bomb', (64, 64))
+        self.explosion_frames = sr.get_explosion_frames(sr.EXPLOSION_RADIUS, sr.EXPLOSION_SPEED)
+        self.layers = [sr.SceneLayer('entities', self.all_sprites), sr.SceneLayer('effects', self.explosions)]
+
+    def draw_layers(self):
+        return self.layers
+
+    def image(self, kind, values):
+        if kind == 'enemies':
+            return sr.enemy_sprites[values[2]]
+        if kind == 'bullets':
+            return self.bullet_image
+        if kind == 'health_powerups':
+            return self.health_image
+        if kind == 'bomb_powerups':
+            return self.bomb_image
+        frame = values[2]
+        return self.explosion_frames[frame - 1] if frame else sr.blank_sprite
+
+    # Aplica o snapshot do servidor e reaplica os inputs ainda não confirmados
+    def apply(self, header, snapshot, pending):
+        self.score = header[3]
+        self.running = bool(header[4])
+        for idx, (x, y, health, invulnerable, alive) in snapshot['players'].items():
+            player = self.players[idx]
+            player.rect.x, player.rect.y = x, y
+            player.health = health
+            # update() desconta um frame do timer ao desenhar a piscada
+            player.invulnerable_timer = invulnerable + 1 if invulnerable else 0
+            if alive and not player.alive():
+                self.all_sprites.add(player)
+            elif not alive:
+                player.kill()
+        if self.local.alive():
+            for seq, bits in pending:
+                self.local.move(bits)
+        for kind, sprites in self.sprites.items():
+            entities = snapshot[kind]
+            group = self.explosions if kind == 'explosions' else self.all_sprites
+            for net_id in [net_id for net_id in sprites if net_id not in entities]:
+                sprites.pop(net_id).kill()
+            for net_id, values in entities.items():
+                sprite = sprites.get(net_id)
+                image = self.image(kind, values)
+                if sprite is None:
+                    sprite = sprites[net_id] = NetSprite(image)
+                    group.add(sprite)
+                sprite.image = image
+                if kind == 'explosions':
+                    sprite.rect.size = image.get_size()
+                    sprite.rect.center = values[:2]
+                else:
+                    sprite.rect.topleft = values[:2]
+
+    # Previsão: a nave local anda no mesmo frame em que a tecla é lida
+    def predict(self, bits):
+        for player in self.players:
+            player.inputs = bits if player is self.local else 0
+        self.all_sprites.update()
+
+def run_client(host, port, ship=None, render_mode="full"):
+    if ship is None:
+        ship = sr.select_ship(1, CONTROLS)
+    client = Client(host, port, ship)
+    screen = sr.screen
+    stars = sr.Starfield()
+
+    # Espera o servidor liberar a partida
+    while client.welcome is None:
+        sr.clock.tick(10)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+        client.join()
+        client.poll()
+        screen.fill(sr.BLACK)
+        stars.update()
+        stars.draw(screen)
+        sr.blit_text(screen, "Aguardando o outro jogador...", 48, sr.WHITE, (sr.WIDTH // 2, sr.HEIGHT // 2))
+        pygame.display.flip()
+
+    view = NetView(client.welcome)
+    hud = sr.HUD()
+    renderer = sr.Renderer(screen, render_mode)
+    while view.running:
+        sr.clock.tick(sr.FPS)
+        pressed_keys = set()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN:
+                pressed_keys.add(event.key)
+        decoded = client.poll()
+        if decoded:
+            view.apply(*decoded, client.pending)
+        if client.timed_out():
+            print("o servidor não responde")
+            break
+        bits = sr.read_input(pygame.key.get_pressed(), CONTROLS, pressed_keys)
+        client.send_input(bits)
+        view.predict(bits)
+        stars.update()
+        renderer.render(view, stars, hud)
+        if client.download.tick():
+            client.decode.tick()
+            pygame.display.set_caption(f"Space Raiders - {client.download.last[0] / 1024:.1f} KB/s, "
+                                       f"decode {client.decode.last[2]:.0f} µs")
+
+    size, decode = client.decode.summary()
+    print(f"recebido: média {size:.0f} B/snapshot, decode {decode:.0f} µs")
+    final_score_text = sr.get_font(60).render(f"Score: {view.score}", True, sr.WHITE)
+    while True:
+        sr.clock.tick(sr.FPS)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or event.type == pygame.KEYDOWN:
+                pygame.quit()
+                return
+        screen.fill(sr.BLACK)
+        stars.update()
+        stars.draw(screen)
+        sr.draw_game_over(screen, final_score_text)
+        pygame.display.flip()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Space Raiders em rede (UDP)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    server = commands.add_parser("server", help="roda a partida oficial, sem janela")
+    server.add_argument("--host", default="0.0.0.0", help="endereço para escutar")
+    server.add_argument("--port", type=int, default=DEFAULT_PORT)
+    server.add_argument("--players", type=int, choices=[1, 2], default=2, help="jogadores esperados")
+    server.add_argument("--seed", type=int, help="semente da partida")
+    client = commands.add_parser("client", help="entra numa partida")
+    client.add_argument("--host", default="127.0.0.1", help="endereço do servidor")
+    client.add_argument("--port", type=int, default=DEFAULT_PORT)
+    client.add_argument("--ship", type=int, choices=range(len(sr.SHIP_NAMES)), help="nave (padrão: escolher no menu)")
+    client.add_argument("--render", choices=sr.RENDER_MODES, default="full")
+    args = parser.parse_args(argv)
+    if args.command == "server":
+        Server(args.host, args.port, args.players, args.seed).run()
+    else:
+        run_client(args.host, args.port, args.ship, args.render)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
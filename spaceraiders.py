@@ -8,6 +8,33 @@ import pygame        # biblioteca principal para jogos 2D
 import random        # para gerar posições e velocidades aleatórias
 import sys           # para sair do programa corretamente
 import os            # para verificar arquivos
+import struct        # para o formato binário das gravações
+import zlib          # para compactar as gravações e calcular checksums
+import argparse      # para as opções de linha de comando
+import time          # para medir o tempo de cada fase do frame
+import json          # para exportar as medições
+import csv           # para exportar as medições
+import heapq         # fila de prioridade dos spawns
+import mmap          # para mapear o pacote de sprites na memória
+import sqlite3       # para guardar os recordes
+import threading     # para gravar os recordes sem travar o jogo
+import queue         # fila de recordes a gravar
+import atexit        # para gravar os recordes pendentes ao sair
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Início do processo, para medir o tempo até o primeiro frame
+STARTUP_TIME = time.perf_counter()
+
+# NumPy é opcional: sem ele o fundo usa as estrelas em Python puro
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Replays rodam sem janela
+if __name__ == "__main__" and "--replay" in sys.argv:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
 
 # Inicialização do Pygame
 pygame.init()
@@ -21,108 +48,579 @@ pygame.display.set_caption("Space Raiders")        # define o nome da janela
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 RED = (255, 0, 0)
+YELLOW = (255, 220, 0)
 
 # Clock para controlar os frames por segundo (FPS)
 clock = pygame.time.Clock()
 FPS = 60  # o jogo será atualizado 60 vezes por segundo
 
-# Carrega sprites das naves
-ship_sprites = []
-for i in range(1, 6):
-    ship_path = f"ships/ship{i}.png"
-    if os.path.exists(ship_path):
-        ship_sprites.append(pygame.image.load(ship_path))
-    else:
-        # Fallback para sprite simples se a imagem não existir
+# Posições iniciais dos jogadores (centerx, bottom)
+PLAYER1_START = (WIDTH//2 - 80, HEIGHT - 10)
+PLAYER2_START = (WIDTH//2 + 80, HEIGHT - 10)
+
+# Bits do input de cada jogador em um frame da simulação
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_UP = 4
+INPUT_DOWN = 8
+INPUT_SHOOT = 16
+
+# Arquivos das sprites usadas no jogo (nome -> caminho)
+SPRITE_FILES = {
+    'ship1': os.path.join("ships", "ship1.png"),
+    'ship2': os.path.join("ships", "ship2.png"),
+    'ship3': os.path.join("ships", "ship3.png"),
+    'ship4': os.path.join("ships", "ship4.png"),
+    'ship5': os.path.join("ships", "ship5.png"),
+    'health': os.path.join("health", "health.png"),
+    'healthbar-full': os.path.join("health", "healthbar-full.png"),
+    'healthbar-empty': os.path.join("health", "healthbar-empty.png"),
+    'bomb': os.path.join("powerups", "bomb.png"),
+    'projectile': os.path.join("projectiles", "projectile.png"),
+}
+SHIP_NAMES = ['ship1', 'ship2', 'ship3', 'ship4', 'ship5']
+
+# Tamanhos e rotações usados pelo jogo, pré-calculados na inicialização
+PRELOAD_SPRITES = [(name, (64, 64), 0) for name in SHIP_NAMES] + \
+                  [(name, (64, 64), 180) for name in SHIP_NAMES] + \
+                  [(name, (40, 40), 0) for name in SHIP_NAMES] + [
+    ('health', (64, 64), 0),
+    ('healthbar-full', (64, 64), 0),
+    ('healthbar-empty', (64, 64), 0),
+    ('bomb', (64, 64), 0),
+    ('projectile', (12, 12), 0),
+]
+
+# Cria a sprite simples usada quando a imagem não existe
+def make_fallback_sprite(name):
+    if name.startswith('ship'):
         fallback = pygame.Surface((40, 40))
         fallback.fill(WHITE)
         pygame.draw.polygon(fallback, RED, [(0, 40), (20, 0), (40, 40)])
-        ship_sprites.append(fallback)
-
-# Carrega sprites da vida
-health_powerup_sprite = None
-health_full_sprite = None
-health_empty_sprite = None
-
-if os.path.exists("health/health.png"):
-    health_powerup_sprite = pygame.image.load("health/health.png")
-else:
-    # Fallback para sprite de vida
-    health_powerup_sprite = pygame.Surface((20, 20))
-    health_powerup_sprite.fill((0, 255, 0))  # Verde
-    pygame.draw.circle(health_powerup_sprite, WHITE, (10, 10), 8)
-
-if os.path.exists("health/healthbar-full.png"):
-    health_full_sprite = pygame.image.load("health/healthbar-full.png")
-else:
-    # Fallback para barra de vida cheia
-    health_full_sprite = pygame.Surface((20, 20))
-    health_full_sprite.fill((255, 0, 0))  # Vermelho
-
-if os.path.exists("health/healthbar-empty.png"):
-    health_empty_sprite = pygame.image.load("health/healthbar-empty.png")
-else:
-    # Fallback para barra de vida vazia
-    health_empty_sprite = pygame.Surface((20, 20))
-    health_empty_sprite.fill((100, 100, 100))  # Cinza
-
-# Carrega sprite da bomba
-bomb_powerup_sprite = None
-if os.path.exists("powerups/bomb.png"):
-    bomb_powerup_sprite = pygame.image.load("powerups/bomb.png")
-else:
-    # Fallback para sprite de bomba
-    bomb_powerup_sprite = pygame.Surface((20, 20))
-    bomb_powerup_sprite.fill((255, 255, 0))  # Amarelo
-    pygame.draw.circle(bomb_powerup_sprite, RED, (10, 10), 8)
-    pygame.draw.circle(bomb_powerup_sprite, WHITE, (10, 10), 4)
+    elif name == 'health':
+        fallback = pygame.Surface((20, 20))
+        fallback.fill((0, 255, 0))  # Verde
+        pygame.draw.circle(fallback, WHITE, (10, 10), 8)
+    elif name == 'healthbar-full':
+        fallback = pygame.Surface((20, 20))
+        fallback.fill((255, 0, 0))  # Vermelho
+    elif name == 'healthbar-empty':
+        fallback = pygame.Surface((20, 20))
+        fallback.fill((100, 100, 100))  # Cinza
+    elif name == 'bomb':
+        fallback = pygame.Surface((20, 20))
+        fallback.fill((255, 255, 0))  # Amarelo
+        pygame.draw.circle(fallback, RED, (10, 10), 8)
+        pygame.draw.circle(fallback, WHITE, (10, 10), 4)
+    else:
+        fallback = pygame.Surface((12, 12))
+        fallback.fill(WHITE)
+    return prepare_surface(fallback)
+
+# Modo do teste fino de colisão: "rect" (retângulos, como pygame.sprite) ou
+# "mask" (máscaras de pixel para as naves)
+COLLISION_MODE = "rect"
+COLLISION_CELL = 64
+
+# Contador de alocações do frame atual (Surfaces e inimigos criados).
+# O loop principal zera a contagem a cada frame e guarda a do frame anterior
+# em last_frame_allocs, que deve ficar zerada no estado estável do jogo.
+frame_allocs = {'surfaces': 0, 'enemies': 0}
+last_frame_allocs = dict(frame_allocs)
+
+def count_alloc(kind, amount=1):
+    frame_allocs[kind] += amount
+
+def reset_frame_allocs():
+    last_frame_allocs.update(frame_allocs)
+    for kind in frame_allocs:
+        frame_allocs[kind] = 0
+    return last_frame_allocs
+
+# Conversão de Surfaces para o formato de pixel da tela. Blitar uma Surface
+# em outro formato obriga o SDL a converter pixel a pixel a cada blit, então
+# toda Surface desenhada no jogo (sprites carregadas, escaladas, rotacionadas,
+# fallbacks e textos) passa por prepare_surface, que converte uma vez (só se
+# precisar) e liga o RLE conforme o modo de transparência:
+#   "opaque":   sem transparência (convert)
+#   "colorkey": uma cor transparente (convert + colorkey com RLE)
+#   "alpha":    alpha por pixel (convert_alpha + RLE)
+# Com o RLE, as linhas transparentes das sprites são puladas no blit (cerca de
+# 5x mais rápido que o alpha por pixel comum). Surfaces redesenhadas com
+# frequência (como o HUD) usam rle=False, porque cada alteração recodifica, e
+# os textos também: nas bordas suavizadas o blit RLE arredonda o alpha de
+# outro jeito (as sprites só têm pixels opacos ou transparentes).
+display_masks = {}
+
+# O modo vem do formato (canal alpha) e não da flag SRCALPHA, que também
+# aparece em Surfaces com transparência global (set_alpha)
+def surface_mode(surface):
+    if surface.get_masks()[3]:
+        return 'alpha'
+    if surface.get_colorkey() is not None:
+        return 'colorkey'
+    return 'opaque'
+
+# Máscaras RGBA do formato da tela para cada modo
+def native_masks(mode):
+    masks = display_masks.get(mode)
+    if masks is None:
+        probe = pygame.Surface((1, 1), pygame.SRCALPHA)
+        masks = (probe.convert_alpha() if mode == 'alpha' else probe.convert()).get_masks()
+        display_masks[mode] = masks
+    return masks
+
+def is_converted(surface):
+    return surface.get_masks() == native_masks(surface_mode(surface))
+
+# Não entra em count_alloc: quem cria a Surface conta uma vez por Surface
+# guardada, com a conversão incluída
+def prepare_surface(surface, rle=True):
+    mode = surface_mode(surface)
+    if not is_converted(surface):
+        surface = surface.convert_alpha() if mode == 'alpha' else surface.convert()
+    if rle and mode == 'alpha':
+        surface.set_alpha(surface.get_alpha(), pygame.RLEACCEL)
+    elif rle and mode == 'colorkey':
+        surface.set_colorkey(surface.get_colorkey(), pygame.RLEACCEL)
+    return surface
+
+# Verificação de depuração (--check-surfaces): avisa, uma vez por Surface,
+# quando algo fora do formato da tela é desenhado no loop do jogo
+class SurfaceChecker:
+    def __init__(self):
+        self.checked = set()
+        self.warnings = 0
+
+    def check(self, sequence):
+        for item in sequence:
+            image = item[0]
+            if image in self.checked:
+                continue
+            self.checked.add(image)
+            if not is_converted(image):
+                self.warnings += 1
+                print(f"Aviso: Surface {image.get_size()} fora do formato da tela "
+                      f"({surface_mode(image)}, {image.get_bitsize()} bits, máscaras {image.get_masks()})")
+
+surface_checker = None
+
+def enable_surface_check():
+    global surface_checker
+    surface_checker = SurfaceChecker()
+    return surface_checker
+
+# Gerenciador de sprites: carrega cada imagem uma única vez e guarda as
+# versões escaladas/rotacionadas por (nome, tamanho, rotação)
+base_sprites = {}
+sprite_cache = {}
+
+# Decodifica o PNG; não usa a janela, então pode rodar em outra thread
+def decode_sprite(name):
+    path = SPRITE_FILES[name]
+    if os.path.exists(path):
+        return pygame.image.load(path)
+    return None
+
+# Converte para o formato da tela (só na thread principal) e guarda
+def store_sprite(name, image):
+    if image is not None:
+        sprite = prepare_surface(image)
+    else:
+        # Fallback para sprite simples se a imagem não existir
+        sprite = make_fallback_sprite(name)
+    count_alloc('surfaces')
+    base_sprites[name] = sprite
+    return sprite
+
+def load_sprite(name):
+    return store_sprite(name, decode_sprite(name))
+
+def get_sprite(name, size=None, rotation=0):
+    key = (name, size, rotation)
+    sprite = sprite_cache.get(key)
+    if sprite is None:
+        sprite = base_sprites.get(name)
+        if sprite is None:
+            sprite = load_sprite(name)
+        if size is not None:
+            sprite = pygame.transform.scale(sprite, size)
+        if rotation:
+            sprite = pygame.transform.rotate(sprite, rotation)
+        sprite = prepare_surface(sprite)
+        count_alloc('surfaces')
+        sprite_cache[key] = sprite
+    return sprite
+
+# Pacote de sprites (gerado por build_assets.py): as imagens originais e as
+# versões escaladas/rotacionadas de PRELOAD_SPRITES em pixels crus, com um
+# índice no início. O arquivo é mapeado na memória e as Surfaces usam os
+# pixels direto do mapeamento (image.frombuffer), sem decodificar PNG. A
+# variável de ambiente SPACERAIDERS_PACK troca o arquivo (vazia desliga).
+DEFAULT_ASSET_PACK = "assets.pack"
+ASSET_PACK = os.environ.get("SPACERAIDERS_PACK", DEFAULT_ASSET_PACK)
+PACK_MAGIC = b"SRPK"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct("<4sB4sI")     # magic, versão, formato dos pixels, número de sprites
+PACK_ENTRY = struct.Struct("<16sHHhHHQ")   # nome, tamanho pedido (0x0 = original), rotação, largura, altura, offset
+PACK_FORMAT = "BGRA" if sys.byteorder == "little" else "ARGB"  # o formato de convert_alpha()
+asset_pack = None  # o mapeamento precisa continuar aberto enquanto as Surfaces existirem
+
+# Chaves (nome, tamanho, rotação) das sprites que vão no pacote
+def pack_sprite_keys():
+    return [(name, None, 0) for name in SPRITE_FILES] + PRELOAD_SPRITES
+
+# Grava o pacote; sprites é uma lista de ((nome, tamanho, rotação), Surface)
+def write_asset_pack(path, sprites):
+    offset = PACK_HEADER.size + PACK_ENTRY.size * len(sprites)
+    entries = []
+    pixels = []
+    for (name, size, rotation), surface in sprites:
+        data = pygame.image.tobytes(surface, PACK_FORMAT)
+        width, height = surface.get_size()
+        entries.append(PACK_ENTRY.pack(name.encode(), *(size or (0, 0)), rotation, width, height, offset))
+        pixels.append(data)
+        offset += len(data)
+    # Grava num arquivo temporário e troca: um build interrompido não deixa
+    # um pacote cortado (e mais novo que os PNGs) no lugar
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, PACK_FORMAT.encode(), len(sprites)))
+        f.writelines(entries)
+        f.writelines(pixels)
+    os.replace(temp_path, path)
+
+# O pacote só é usado se for mais novo que todos os PNGs
+def asset_pack_fresh(path):
+    if not path or not os.path.exists(path):
+        return False
+    built = os.path.getmtime(path)
+    return all(os.path.getmtime(file) <= built for file in SPRITE_FILES.values() if os.path.exists(file))
+
+# Índice do pacote: [(nome, tamanho pedido, rotação, tamanho, início, fim)].
+# ValueError se o arquivo for de outra versão ou estiver cortado
+def read_pack_index(pack):
+    magic, version, pixel_format, count = PACK_HEADER.unpack_from(pack)
+    if magic != PACK_MAGIC or version != PACK_VERSION:
+        raise ValueError("outra versão do pacote")
+    if pixel_format != PACK_FORMAT.encode():
+        raise ValueError("outro formato de pixels")
+    index = []
+    for idx in range(count):
+        name, width, height, rotation, sprite_width, sprite_height, offset = \
+            PACK_ENTRY.unpack_from(pack, PACK_HEADER.size + idx * PACK_ENTRY.size)
+        end = offset + sprite_width * sprite_height * 4
+        if end > len(pack):
+            raise ValueError("arquivo cortado")
+        index.append((name.rstrip(b"\0").decode(), (width, height), rotation, (sprite_width, sprite_height),
+                      offset, end))
+    return PACK_FORMAT, index
+
+# Carrega as sprites do pacote para base_sprites/sprite_cache; devolve False
+# (e o jogo usa os PNGs) se o pacote não existir, estiver desatualizado, for
+# de outra versão ou estiver corrompido
+def load_asset_pack(path=ASSET_PACK):
+    global asset_pack
+    if not asset_pack_fresh(path):
+        return False
+    try:
+        with open(path, "rb") as f:
+            # ACCESS_COPY: as páginas são compartilhadas com o cache do sistema e
+            # uma escrita numa Surface não altera o arquivo
+            pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError) as e:  # ValueError: arquivo vazio
+        print(f"Pacote de sprites ignorado ({path}): {e}")
+        return False
+    try:
+        pixel_format, index = read_pack_index(pack)
+    except (ValueError, struct.error, UnicodeDecodeError) as e:
+        print(f"Pacote de sprites ignorado ({path}): {e}")
+        pack.close()
+        return False
+    view = memoryview(pack)
+    for name, (width, height), rotation, size, offset, end in index:
+        sprite = pygame.image.frombuffer(view[offset:end], size, pixel_format)
+        count_alloc('surfaces')
+        # Os pixels continuam no mapeamento se já estiverem no formato da tela
+        sprite = prepare_surface(sprite)
+        if width:
+            sprite_cache[(name, (width, height), rotation)] = sprite
+        else:
+            base_sprites[name] = sprite
+    asset_pack = pack
+    return True
+
+# Máscaras de colisão por Surface (usadas no modo "mask")
+mask_cache = {}
+
+def get_mask(surface):
+    mask = mask_cache.get(surface)
+    if mask is None:
+        mask = pygame.mask.from_surface(surface)
+        mask_cache[surface] = mask
+    return mask
+
+# Variações visuais de uma Surface por estado (por exemplo a nave piscando
+# entre "normal" e "faded"). Cada variação é criada uma única vez e
+# compartilhada por todos os sprites com a mesma imagem; o valor de cada
+# estado é a transparência aplicada (None = a própria imagem).
+IMAGE_STATES = {
+    'normal': None,
+    'faded': 100,
+    'excluded': 80,  # nave já escolhida pelo outro jogador no menu
+}
+state_image_cache = {}
+
+def get_state_image(surface, state):
+    key = (surface, state)
+    image = state_image_cache.get(key)
+    if image is None:
+        alpha = IMAGE_STATES[state]
+        image = surface
+        if alpha is not None:
+            image = surface.copy()
+            image.set_alpha(alpha)
+            count_alloc('surfaces')
+        state_image_cache[key] = image
+    return image
+
+# Tempos da inicialização em ms desde STARTUP_TIME ('first_frame' e
+# 'assets_ready'), mostrados pelo profiler
+startup_times = {}
 
+def mark_startup(name):
+    if name not in startup_times:
+        startup_times[name] = (time.perf_counter() - STARTUP_TIME) * 1000
+
+# Carregamento das sprites em segundo plano: os PNGs são decodificados num
+# pool de threads e poll(), chamado pelos loops da thread principal, converte
+# e pré-escala as que já terminaram. Assim o menu aparece enquanto as imagens
+# ainda carregam.
+ASSET_WORKERS = 4
+
+class AssetLoader:
+    def __init__(self, names, workers=ASSET_WORKERS):
+        self.names = list(names)
+        self.workers = workers
+        self.pending = {}
+        self.loaded = 0
+        self.executor = None
+
+    # Usa o pacote de sprites se houver; o que faltar vem dos PNGs
+    def start(self):
+        if load_asset_pack():
+            self.loaded = sum(1 for name in self.names if name in base_sprites)
+        self.executor = ThreadPoolExecutor(self.workers)
+        self.pending = {name: self.executor.submit(decode_sprite, name)
+                        for name in self.names if name not in base_sprites}
+        if not self.pending:
+            self.poll()
+
+    @property
+    def done(self):
+        return self.loaded == len(self.names)
+
+    def progress(self):
+        return self.loaded / len(self.names)
+
+    # Termina as sprites já decodificadas (todas, com block=True)
+    def poll(self, block=False):
+        for name, future in list(self.pending.items()):
+            if not block and not future.done():
+                continue
+            store_sprite(name, future.result())
+            for preload_name, size, rotation in PRELOAD_SPRITES:
+                if preload_name == name:
+                    get_sprite(name, size, rotation)
+            del self.pending[name]
+            self.loaded += 1
+        if self.done and self.executor:
+            self.executor.shutdown()
+            self.executor = None
+            build_sprite_tables()
+            mark_startup('assets_ready')
+        return self.progress()
+
+# Tabelas das naves por índice, preenchidas quando as sprites terminam de
+# carregar (as listas são as mesmas, só ganham os itens)
+ship_sprites = []
+# Naves inimigas (64x64, rotacionadas 180 graus)
+enemy_sprites = []
+
+def build_sprite_tables():
+    ship_sprites[:] = [base_sprites[name] for name in SHIP_NAMES]
+    enemy_sprites[:] = [get_sprite(name, (64, 64), 180) for name in SHIP_NAMES]
+
+asset_loader = AssetLoader(SPRITE_FILES)
+
+# Espera as sprites terminarem de carregar, mostrando o progresso na tela
+def wait_for_assets():
+    if not asset_loader.done:
+        LoadingScreen().run(screen)
+
+# Barra de progresso do carregamento
+def draw_loading_bar(screen, progress):
+    bar = pygame.Rect(0, 0, 400, 12)
+    bar.center = (WIDTH//2, HEIGHT - 60)
+    pygame.draw.rect(screen, WHITE, bar, 1)
+    pygame.draw.rect(screen, WHITE, (bar.x, bar.y, int(bar.width * progress), bar.height))
+
+# Rodando o jogo, as sprites carregam em segundo plano enquanto o menu já
+# aparece; importado como módulo (benchmarks, testes), carrega tudo aqui
+asset_loader.start()
+if __name__ != "__main__":
+    asset_loader.poll(block=True)
+
+# Cache de fontes e de textos renderizados: SysFont e font.render são caros,
+# então cada fonte e cada texto fixo é criado uma única vez
+font_cache = {}
+text_cache = {}
+
+def get_font(size):
+    font = font_cache.get(size)
+    if font is None:
+        font = pygame.font.SysFont(None, size)
+        font_cache[size] = font
+    return font
+
+def render_text(text, size, color=WHITE):
+    key = (text, size, color)
+    surface = text_cache.get(key)
+    if surface is None:
+        surface = prepare_surface(get_font(size).render(text, True, color), rle=False)
+        count_alloc('surfaces')
+        text_cache[key] = surface
+    return surface
+
+# Desenha um texto do cache centralizado na posição indicada
+def blit_text(surface, text, size, color, center):
+    text_surface = render_text(text, size, color)
+    surface.blit(text_surface, text_surface.get_rect(center=center))
+
+
+# Telas de menu orientadas a eventos. Em vez de redesenhar a 60 FPS, o loop
+# dorme em pygame.event.wait até chegar um evento ou até o próximo quadro de
+# animação (frame_time em ms; None = tela parada, dorme até um evento) e só
+# redesenha quando handle() ou animate() avisam que algo mudou. Parado num
+# menu, o jogo praticamente não usa CPU.
+LOADING_POLL_MS = 50            # verificação do carregamento das sprites
+GAME_OVER_FPS = 30              # estrelas animadas na tela de game over
+
+class MenuScreen:
+    frame_time = None
+
+    def __init__(self):
+        self.running = True
+
+    # Devolve True se o evento mudou algo na tela
+    def handle(self, event):
+        return False
+
+    # Chamado a cada frame_time ms; devolve True se algo mudou
+    def animate(self):
+        return False
+
+    def draw(self, screen):
+        pass
+
+    def quit(self):
+        pygame.quit()
+        sys.exit()
+
+    def run(self, screen):
+        dirty = True
+        next_frame = pygame.time.get_ticks()
+        while self.running:
+            if dirty:
+                self.draw(screen)
+                pygame.display.flip()
+                dirty = False
+            if self.frame_time is None:
+                events = [pygame.event.wait()]
+            else:
+                wait = next_frame - pygame.time.get_ticks()
+                events = [pygame.event.wait(wait)] if wait > 0 else []
+            events += pygame.event.get()
+            for event in events:
+                if event.type == pygame.QUIT:
+                    self.quit()
+                if event.type != pygame.NOEVENT and self.handle(event):
+                    dirty = True
+            if self.frame_time is not None and pygame.time.get_ticks() >= next_frame:
+                # Depois de uma pausa longa não tenta recuperar os quadros perdidos
+                next_frame = max(next_frame + self.frame_time, pygame.time.get_ticks())
+                if self.animate():
+                    dirty = True
+
+# Tela de "Carregando..." enquanto as sprites não ficam prontas
+class LoadingScreen(MenuScreen):
+    frame_time = LOADING_POLL_MS
+
+    def animate(self):
+        asset_loader.poll()
+        self.running = not asset_loader.done
+        return self.running
+
+    def draw(self, screen):
+        screen.fill(BLACK)
+        blit_text(screen, "Carregando...", 48, WHITE, (WIDTH//2, HEIGHT//2 - 40))
+        draw_loading_bar(screen, asset_loader.progress())
+
+# Escolha do número de jogadores; enquanto as sprites carregam, a barra de
+# progresso é atualizada a cada LOADING_POLL_MS
+class NumPlayersMenu(MenuScreen):
+    def __init__(self):
+        super().__init__()
+        self.selected = 1
+        self.loading = not asset_loader.done
+        self.frame_time = LOADING_POLL_MS if self.loading else None
+
+    def handle(self, event):
+        if event.type != pygame.KEYDOWN:
+            return False
+        previous = self.selected
+        if event.key == pygame.K_LEFT or event.key == pygame.K_a:
+            self.selected = 1
+        elif event.key == pygame.K_RIGHT or event.key == pygame.K_d:
+            self.selected = 2
+        elif event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
+            self.running = False
+        return self.selected != previous
+
+    def animate(self):
+        asset_loader.poll()
+        if asset_loader.done:
+            # Carregou: um último desenho sem a barra e a tela fica parada
+            self.loading = False
+            self.frame_time = None
+        return True
+
+    def draw(self, screen):
+        draw_num_players_menu(screen, self.selected)
+        if self.loading:
+            draw_loading_bar(screen, asset_loader.progress())
+        mark_startup('first_frame')
 
 # Função para escolher o número de jogadores (1 ou 2)
 def select_num_players():
-    selecting = True
-    selected = 1
-    font = pygame.font.SysFont(None, 48)
-    while selecting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT or event.key == pygame.K_a:
-                    selected = 1
-                elif event.key == pygame.K_RIGHT or event.key == pygame.K_d:
-                    selected = 2
-                elif event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
-                    selecting = False
-        screen.fill(BLACK)
-        title = font.render("Space Raiders", True, WHITE)
-        title_rect = title.get_rect(center=(WIDTH//2, HEIGHT//2 - 120))
-        screen.blit(title, title_rect)
-        instr = pygame.font.SysFont(None, 36).render("Escolha o número de jogadores", True, WHITE)
-        instr_rect = instr.get_rect(center=(WIDTH//2, HEIGHT//2 - 60))
-        screen.blit(instr, instr_rect)
-        one_color = (0,255,0) if selected == 1 else WHITE
-        two_color = (0,255,0) if selected == 2 else WHITE
-        one = font.render("1 Jogador", True, one_color)
-        two = font.render("2 Jogadores", True, two_color)
-        one_rect = one.get_rect(center=(WIDTH//2 - 150, HEIGHT//2 + 20))
-        two_rect = two.get_rect(center=(WIDTH//2 + 150, HEIGHT//2 + 20))
-        screen.blit(one, one_rect)
-        screen.blit(two, two_rect)
-        hint = pygame.font.SysFont(None, 28).render("←/A ou →/D para alternar, ENTER/ESPAÇO para confirmar", True, WHITE)
-        hint_rect = hint.get_rect(center=(WIDTH//2, HEIGHT//2 + 100))
-        screen.blit(hint, hint_rect)
-        pygame.display.flip()
-        clock.tick(FPS)
-    return selected
+    menu = NumPlayersMenu()
+    menu.run(screen)
+    return menu.selected
+
+# Desenha a tela de escolha do número de jogadores
+def draw_num_players_menu(screen, selected):
+    screen.fill(BLACK)
+    blit_text(screen, "Space Raiders", 48, WHITE, (WIDTH//2, HEIGHT//2 - 120))
+    blit_text(screen, "Escolha o número de jogadores", 36, WHITE, (WIDTH//2, HEIGHT//2 - 60))
+    one_color = (0,255,0) if selected == 1 else WHITE
+    two_color = (0,255,0) if selected == 2 else WHITE
+    blit_text(screen, "1 Jogador", 48, one_color, (WIDTH//2 - 150, HEIGHT//2 + 20))
+    blit_text(screen, "2 Jogadores", 48, two_color, (WIDTH//2 + 150, HEIGHT//2 + 20))
+    blit_text(screen, "←/A ou →/D para alternar, ENTER/ESPAÇO para confirmar", 28, WHITE, (WIDTH//2, HEIGHT//2 + 100))
 
 # Função para escolher a nave (agora recebe o número do jogador)
 def select_ship(player_num=1, controls=None, exclude_ships=None):
-    selecting = True
-    selected_ship = 0
-    font = pygame.font.SysFont(None, 36)
-    title_font = pygame.font.SysFont(None, 48)
+    wait_for_assets()
     if exclude_ships is None:
         exclude_ships = []
     if controls is None:
@@ -136,50 +634,52 @@ def select_ship(player_num=1, controls=None, exclude_ships=None):
     available_ships = [i for i in range(len(ship_sprites)) if i not in exclude_ships]
     if not available_ships:
         return None
-    selected_ship = available_ships[0]
-    while selecting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == controls['left']:
-                    # Move to previous available ship
-                    idx = available_ships.index(selected_ship)
-                    selected_ship = available_ships[(idx - 1) % len(available_ships)]
-                elif event.key == controls['right']:
-                    idx = available_ships.index(selected_ship)
-                    selected_ship = available_ships[(idx + 1) % len(available_ships)]
-                elif event.key in controls['select']:
-                    selecting = False
-        screen.fill(BLACK)
-        title_text = title_font.render(f"Jogador {player_num}: Escolha sua nave", True, WHITE)
-        title_rect = title_text.get_rect(center=(WIDTH//2, 100))
-        screen.blit(title_text, title_rect)
-        instructions = font.render("Use as setas ← → para escolher, ENTER ou ESPAÇO para confirmar", True, WHITE)
-        inst_rect = instructions.get_rect(center=(WIDTH//2, HEIGHT - 50))
-        screen.blit(instructions, inst_rect)
-        for i, ship in enumerate(ship_sprites):
-            x = WIDTH//2 - (len(ship_sprites) * 60)//2 + i * 60
-            y = HEIGHT//2
-            if i == selected_ship:
-                pygame.draw.rect(screen, WHITE, (x-5, y-5, 50, 50), 2)
-            if i in exclude_ships:
-                # Draw excluded ships faded
-                faded = pygame.transform.scale(ship, (40, 40)).copy()
-                faded.set_alpha(80)
-                ship_rect = faded.get_rect(center=(x + 20, y + 20))
-                screen.blit(faded, ship_rect)
-            else:
-                scaled_ship = pygame.transform.scale(ship, (40, 40))
-                ship_rect = scaled_ship.get_rect(center=(x + 20, y + 20))
-                screen.blit(scaled_ship, ship_rect)
-            number_text = font.render(str(i+1), True, WHITE)
-            number_rect = number_text.get_rect(center=(x + 20, y + 60))
-            screen.blit(number_text, number_rect)
-        pygame.display.flip()
-        clock.tick(FPS)
-    return selected_ship
+    menu = ShipMenu(player_num, controls, exclude_ships, available_ships)
+    menu.run(screen)
+    return menu.selected_ship
+
+# Escolha de nave: tela parada, redesenhada só quando a seleção muda
+class ShipMenu(MenuScreen):
+    def __init__(self, player_num, controls, exclude_ships, available_ships):
+        super().__init__()
+        self.player_num = player_num
+        self.controls = controls
+        self.exclude_ships = exclude_ships
+        self.available_ships = available_ships
+        self.selected_ship = available_ships[0]
+
+    def handle(self, event):
+        if event.type != pygame.KEYDOWN:
+            return False
+        idx = self.available_ships.index(self.selected_ship)
+        if event.key == self.controls['left']:
+            # Move to previous available ship
+            self.selected_ship = self.available_ships[(idx - 1) % len(self.available_ships)]
+        elif event.key == self.controls['right']:
+            self.selected_ship = self.available_ships[(idx + 1) % len(self.available_ships)]
+        elif event.key in self.controls['select']:
+            self.running = False
+        return self.available_ships.index(self.selected_ship) != idx
+
+    def draw(self, screen):
+        draw_ship_menu(screen, self.player_num, self.selected_ship, self.exclude_ships)
+
+# Desenha a tela de escolha de nave
+def draw_ship_menu(screen, player_num, selected_ship, exclude_ships):
+    screen.fill(BLACK)
+    blit_text(screen, f"Jogador {player_num}: Escolha sua nave", 48, WHITE, (WIDTH//2, 100))
+    blit_text(screen, "Use as setas ← → para escolher, ENTER ou ESPAÇO para confirmar", 36, WHITE, (WIDTH//2, HEIGHT - 50))
+    for i, ship in enumerate(ship_sprites):
+        x = WIDTH//2 - (len(ship_sprites) * 60)//2 + i * 60
+        y = HEIGHT//2
+        if i == selected_ship:
+            pygame.draw.rect(screen, WHITE, (x-5, y-5, 50, 50), 2)
+        # Miniaturas pré-escaladas; as naves já escolhidas aparecem apagadas
+        thumbnail = get_sprite(SHIP_NAMES[i], (40, 40))
+        if i in exclude_ships:
+            thumbnail = get_state_image(thumbnail, 'excluded')
+        screen.blit(thumbnail, thumbnail.get_rect(center=(x + 20, y + 20)))
+        blit_text(screen, str(i+1), 36, WHITE, (x + 20, y + 60))
 
 # Função para desenhar a barra de vida (agora suporta múltiplos jogadores)
 def draw_health_bar(screen, player, idx=0):
@@ -192,18 +692,89 @@ def draw_health_bar(screen, player, idx=0):
         health_y = 0
     for i in range(player.max_health):
         if i < player.health:
-            health_sprite = pygame.transform.scale(health_full_sprite, (64, 64))
+            health_sprite = get_sprite('healthbar-full', (64, 64))
         else:
-            health_sprite = pygame.transform.scale(health_empty_sprite, (64, 64))
+            health_sprite = get_sprite('healthbar-empty', (64, 64))
         screen.blit(health_sprite, (health_x + i * 70, health_y))
 
+# Camada do HUD: a pontuação e as barras de vida são compostas numa Surface
+# própria, redesenhada só quando a pontuação ou a vida de algum jogador muda
+class HUD:
+    def __init__(self):
+        self.surface = prepare_surface(pygame.Surface((WIDTH, 64), pygame.SRCALPHA), rle=False)
+        count_alloc('surfaces')
+        self.rect = self.surface.get_rect()
+        self.areas = []
+        self.previous_areas = []
+        self.values = None
+        self.changed = False
+        # Glifos da pontuação renderizados uma vez: prefixo e dígitos 0-9
+        self.score_prefix = render_text("Score: ", 36)
+        self.digits = [render_text(str(d), 36) for d in range(10)]
+
+    def update(self, score, players):
+        values = (score, tuple(player.health for player in players))
+        self.changed = values != self.values
+        if self.changed:
+            self.values = values
+            self.redraw(score, players)
+        return self.changed
+
+    def redraw(self, score, players):
+        self.surface.fill((0, 0, 0, 0))
+        self.previous_areas = self.areas
+        self.areas = [self.draw_score(score)]
+        for idx, player in enumerate(players):
+            draw_health_bar(self.surface, player, idx=idx)
+            self.areas.append(pygame.Rect(WIDTH - 370 if idx == 0 else 10, 0, player.max_health * 70, 64))
+
+    def draw_score(self, score):
+        x, y = 650, 10
+        area = pygame.Rect(x, y, 0, 0)
+        self.surface.blit(self.score_prefix, (x, y))
+        x += self.score_prefix.get_width()
+        for char in str(score):
+            digit = self.digits[int(char)]
+            self.surface.blit(digit, (x, y))
+            x += digit.get_width()
+        area.width = x - area.x
+        area.height = self.score_prefix.get_height()
+        return area
+
+    def draw(self, screen):
+        screen.blits([(self.surface, area, area) for area in self.areas], False)
+
+    # Áreas do HUD que encostam em algum dos retângulos indicados
+    def touched_areas(self, rects):
+        return [area for area in self.areas if area.collidelist(rects) != -1]
+
+    def draw_areas(self, screen, areas):
+        screen.blits([(self.surface, area, area) for area in areas], False)
+
+# Converte o teclado nos bits de input de um jogador. Teclas apertadas neste
+# frame (KEYDOWN) também contam, para um toque rápido no tiro não se perder.
+def read_input(keys, controls, pressed_keys=()):
+    inputs = 0
+    if keys[controls['left']]:
+        inputs |= INPUT_LEFT
+    if keys[controls['right']]:
+        inputs |= INPUT_RIGHT
+    if keys[controls['up']]:
+        inputs |= INPUT_UP
+    if keys[controls['down']]:
+        inputs |= INPUT_DOWN
+    if keys[controls['shoot']] or controls['shoot'] in pressed_keys:
+        inputs |= INPUT_SHOOT
+    return inputs
+
 # Classe da Nave do Jogador (agora suporta controles diferentes)
 class Player(pygame.sprite.Sprite):
-    def __init__(self, ship_index, controls, start_pos=None):
+    def __init__(self, ship_index, controls=None, start_pos=None):
         super().__init__()
-        self.original_image = pygame.transform.scale(ship_sprites[ship_index], (64, 64))
-        self.image = self.original_image.copy()
+        self.original_image = get_sprite(SHIP_NAMES[ship_index], (64, 64))
+        self.image = get_state_image(self.original_image, 'normal')
         self.rect = self.image.get_rect()
+        self.mask = get_mask(self.original_image)
         if start_pos:
             self.rect.centerx, self.rect.bottom = start_pos
         else:
@@ -216,19 +787,29 @@ class Player(pygame.sprite.Sprite):
         self.invulnerable_duration = 120
         self.controls = controls  # Dict with movement/shoot keys
         self.shoot_pressed = False  # To prevent autofire
+        self.inputs = 0  # Input bits for the current frame
 
     def update(self):
-        keys = pygame.key.get_pressed()
+        self.move(self.inputs)
+        # Invulnerability effect (troca entre as imagens pré-calculadas)
+        visual_state = 'normal'
+        if self.invulnerable_timer > 0:
+            self.invulnerable_timer -= 1
+            if self.invulnerable_timer % 10 >= 5:
+                visual_state = 'faded'
+        self.image = get_state_image(self.original_image, visual_state)
+
+    def move(self, inputs):
         dx = 0
         dy = 0
         # Movement
-        if keys[self.controls['left']]:
+        if inputs & INPUT_LEFT:
             dx -= 1
-        if keys[self.controls['right']]:
+        if inputs & INPUT_RIGHT:
             dx += 1
-        if keys[self.controls['up']]:
+        if inputs & INPUT_UP:
             dy -= 1
-        if keys[self.controls['down']]:
+        if inputs & INPUT_DOWN:
             dy += 1
         if dx != 0 or dy != 0:
             length = (dx ** 2 + dy ** 2) ** 0.5
@@ -238,16 +819,6 @@ class Player(pygame.sprite.Sprite):
             self.rect.y += int(dy * self.speed)
         self.rect.x = max(0, min(WIDTH - self.rect.width, self.rect.x))
         self.rect.y = max(0, min(HEIGHT - self.rect.height, self.rect.y))
-        # Invulnerability effect
-        if self.invulnerable_timer > 0:
-            self.invulnerable_timer -= 1
-            if self.invulnerable_timer % 10 < 5:
-                self.image = self.original_image.copy()
-            else:
-                self.image = self.original_image.copy()
-                self.image.set_alpha(100)
-        else:
-            self.image = self.original_image.copy()
 
     def take_damage(self):
         if self.invulnerable_timer <= 0:
@@ -262,41 +833,68 @@ class Player(pygame.sprite.Sprite):
 
 # Classe dos Inimigos
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self, player_ship_index):
+    def __init__(self, player_ship_index, rng=random):
         super().__init__()
+        self.rng = rng  # gerador aleatório (o GameState usa um com semente)
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(player_ship_index)
+
+    # Reinicia o inimigo (usado também quando ele volta do pool)
+    def reset(self, player_ship_index):
         # Escolhe uma nave diferente da do jogador
         available_ships = [i for i in range(len(ship_sprites)) if i != player_ship_index]
-        ship_index = random.choice(available_ships)
-        
-        # Usa o sprite da nave escolhida, rotacionado 180 graus
-        original_ship = pygame.transform.scale(ship_sprites[ship_index], (64, 64))
-        self.image = pygame.transform.rotate(original_ship, 180)
-        
-        self.rect = self.image.get_rect()
-        self.rect.x = random.randint(0, WIDTH - 30)  # posição aleatória na horizontal
-        self.rect.y = -30                            # começa acima da tela
-        self.speed = random.randint(2, 6)            # velocidade aleatória
+        self.set_ship(self.rng.choice(available_ships))
+        self.rect.x = self.rng.randint(0, WIDTH - 30)  # posição aleatória na horizontal
+        self.rect.y = -30                              # começa acima da tela
+        self.speed = self.rng.randint(2, 6)            # velocidade aleatória
+
+    # Usa o sprite da nave escolhida, já rotacionado 180 graus
+    def set_ship(self, ship_index):
+        self.ship_index = ship_index
+        self.image = enemy_sprites[ship_index]
+        self.mask = get_mask(self.image)
+        self.rect.size = self.image.get_size()
 
     def update(self):
         self.rect.y += self.speed  # move o inimigo para baixo
         # Quando sai da tela, reinicia na parte superior com nova posição
         if self.rect.top > HEIGHT:
-            self.rect.x = random.randint(0, WIDTH - 30)
+            self.rect.x = self.rng.randint(0, WIDTH - 30)
             self.rect.y = -30
-            self.speed = random.randint(2, 6)
+            self.speed = self.rng.randint(2, 6)
+
+# Pool de inimigos: reaproveita os inimigos destruídos em vez de criar novos
+class EnemyPool:
+    def __init__(self, rng=random):
+        self.rng = rng
+        self.free = []
+
+    def acquire(self, player_ship_index):
+        if self.free:
+            enemy = self.free.pop()
+            enemy.reset(player_ship_index)
+        else:
+            enemy = Enemy(player_ship_index, self.rng)
+            count_alloc('enemies')
+        return enemy
+
+    def release(self, enemy):
+        enemy.kill()
+        self.free.append(enemy)
+
+    # Inimigo com a nave dada (save states); o chamador define posição e
+    # velocidade. Um inimigo novo ainda sorteia valores no RNG
+    def restore(self, ship_index):
+        enemy = self.free.pop() if self.free else Enemy(ship_index, self.rng)
+        enemy.set_ship(ship_index)
+        return enemy
 
 # Classe dos Tiros
 class Bullet(pygame.sprite.Sprite):
     def __init__(self, x, y):
         super().__init__()
-        # Usa a textura do projétil se existir, senão fallback
-        projectile_path = os.path.join("projectiles", "projectile.png")
-        if os.path.exists(projectile_path):
-            img = pygame.image.load(projectile_path).convert_alpha()
-            self.image = pygame.transform.scale(img, (12, 12))
-        else:
-            self.image = pygame.Surface((12, 12))
-            self.image.fill(WHITE)
+        # Usa a textura do projétil (ou fallback) já carregada no cache
+        self.image = get_sprite('projectile', (12, 12))
         self.rect = self.image.get_rect()
         self.rect.centerx = x
         self.rect.bottom = y
@@ -310,14 +908,14 @@ class Bullet(pygame.sprite.Sprite):
 
 # Classe do Power-up de Vida
 class HealthPowerup(pygame.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, rng=random):
         super().__init__()
         # Usa o sprite de vida ou fallback
-        self.image = pygame.transform.scale(health_powerup_sprite, (64, 64))
+        self.image = get_sprite('health', (64, 64))
         self.rect = self.image.get_rect()
-        self.rect.x = random.randint(0, WIDTH - 25)
+        self.rect.x = rng.randint(0, WIDTH - 25)
         self.rect.y = -25
-        self.speed = random.randint(1, 3)
+        self.speed = rng.randint(1, 3)
 
     def update(self):
         self.rect.y += self.speed
@@ -327,14 +925,14 @@ class HealthPowerup(pygame.sprite.Sprite):
 
 # Classe do Power-up de Bomba
 class BombPowerup(pygame.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, rng=random):
         super().__init__()
         # Usa o sprite de bomba ou fallback
-        self.image = pygame.transform.scale(bomb_powerup_sprite, (64, 64))
+        self.image = get_sprite('bomb', (64, 64))
         self.rect = self.image.get_rect()
-        self.rect.x = random.randint(0, WIDTH - 64)
+        self.rect.x = rng.randint(0, WIDTH - 64)
         self.rect.y = -64
-        self.speed = random.randint(1, 3)
+        self.speed = rng.randint(1, 3)
 
     def update(self):
         self.rect.y += self.speed
@@ -342,19 +940,506 @@ class BombPowerup(pygame.sprite.Sprite):
         if self.rect.top > HEIGHT:
             self.kill()
 
-# Classe da Explosão com efeito ripple
+# Armazenamento em arrays (struct-of-arrays) para inimigos e tiros, usado no
+# lugar dos grupos de sprites quando o GameState é criado com
+# entity_store=True: as colunas x/y/speed/alive ficam em arrays NumPy, o
+# movimento é vetorizado e o desenho usa um único Surface.blits. Cada entidade
+# guarda a ordem em que foi criada (coluna order) para que colisões e sorteios
+# aconteçam na mesma ordem dos grupos de sprites; assim a partida é idêntica
+# nos dois modos. Os slots de entidades mortas são reaproveitados.
+class EntityStore:
+    columns = ('x', 'y', 'speed', 'alive', 'order', 'prev_x', 'prev_y')
+    snapshot_columns = ('x', 'y', 'speed')
+
+    def __init__(self, width, height, capacity=64):
+        self.width = width
+        self.height = height
+        self.x = np.zeros(capacity, np.int32)
+        self.y = np.zeros(capacity, np.int32)
+        self.speed = np.zeros(capacity, np.int32)
+        self.alive = np.zeros(capacity, bool)
+        self.order = np.zeros(capacity, np.int64)
+        # Posições antes do último passo (para a interpolação, ver capture)
+        self.prev_x = np.zeros(capacity, np.int32)
+        self.prev_y = np.zeros(capacity, np.int32)
+        self.free = list(range(capacity - 1, -1, -1))
+        self.counter = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    # Dobra a capacidade de todas as colunas
+    def grow(self):
+        capacity = len(self.alive)
+        for name in self.columns:
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+        self.free.extend(range(capacity * 2 - 1, capacity - 1, -1))
+
+    def add(self, x, y, speed):
+        if not self.free:
+            self.grow()
+        slot = self.free.pop()
+        self.x[slot] = self.prev_x[slot] = x
+        self.y[slot] = self.prev_y[slot] = y
+        self.speed[slot] = speed
+        self.alive[slot] = True
+        self.order[slot] = self.counter
+        self.counter += 1
+        self.count += 1
+        return slot
+
+    def kill(self, slots):
+        slots = [slot for slot in np.asarray(slots).tolist() if self.alive[slot]]
+        self.alive[slots] = False
+        self.free.extend(slots)
+        self.count -= len(slots)
+
+    def clear(self):
+        self.kill(np.flatnonzero(self.alive))
+
+    # Slots vivos na ordem de criação (a ordem de um pygame.sprite.Group)
+    def active(self):
+        slots = np.flatnonzero(self.alive)
+        return slots[np.argsort(self.order[slots], kind='stable')]
+
+    def positions(self):
+        slots = self.active()
+        return list(zip(self.x[slots].tolist(), self.y[slots].tolist()))
+
+    # Máscara das entidades (entre os slots dados) que colidem com o rect,
+    # com o mesmo teste de Rect.colliderect
+    def overlaps(self, rect, slots):
+        x = self.x[slots]
+        y = self.y[slots]
+        return (x < rect.right) & (x + self.width > rect.left) & (y < rect.bottom) & (y + self.height > rect.top)
+
+    # Muda a posição sem interpolar desde a anterior
+    def place(self, slot, position):
+        self.x[slot] = self.prev_x[slot] = position[0]
+        self.y[slot] = self.prev_y[slot] = position[1]
+
+    # Colunas snapshot_columns das entidades vivas, na ordem de criação (para
+    # os save states), como um array int32 (coluna, entidade)
+    def snapshot(self):
+        slots = self.active()
+        return np.array([getattr(self, name)[slots] for name in self.snapshot_columns], np.int32)
+
+    # Recria as entidades a partir de snapshot(), nos primeiros slots
+    def restore(self, columns):
+        count = columns.shape[1]
+        while len(self.alive) < count:
+            self.grow()
+        self.alive[:] = False
+        self.alive[:count] = True
+        for name, column in zip(self.snapshot_columns, columns):
+            getattr(self, name)[:count] = column
+        self.prev_x[:count] = self.x[:count]
+        self.prev_y[:count] = self.y[:count]
+        self.order[:count] = np.arange(count)
+        self.counter = self.count = count
+        self.free = list(range(len(self.alive) - 1, count - 1, -1))
+
+    # Guarda as posições antes de um passo da simulação
+    def capture(self):
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+
+    # Posições de desenho: com alpha < 1, entre a posição anterior e a atual
+    # (saltos grandes, como a volta ao topo, vão direto para a atual)
+    def draw_positions(self, slots, alpha=1.0):
+        x = self.x[slots]
+        y = self.y[slots]
+        if alpha < 1:
+            prev_x = self.prev_x[slots]
+            prev_y = self.prev_y[slots]
+            near = (np.abs(x - prev_x) <= INTERPOLATION_MAX_JUMP) & (np.abs(y - prev_y) <= INTERPOLATION_MAX_JUMP)
+            x = np.where(near, np.rint(prev_x + (x - prev_x) * alpha), x).astype(np.int32)
+            y = np.where(near, np.rint(prev_y + (y - prev_y) * alpha), y).astype(np.int32)
+        return zip(x.tolist(), y.tolist())
+
+    def images(self, slots):
+        return [self.image] * len(slots)
+
+    def blit_sequence(self, alpha=1.0):
+        slots = self.active()
+        return list(zip(self.images(slots), self.draw_positions(slots, alpha)))
+
+# Inimigos em arrays: mesmo sorteio de Enemy.reset e mesmo retorno ao topo
+# de Enemy.update
+class EnemyStore(EntityStore):
+    columns = EntityStore.columns + ('ship',)
+    snapshot_columns = EntityStore.snapshot_columns + ('ship',)
+
+    def __init__(self, rng=random, capacity=64):
+        width, height = enemy_sprites[0].get_size()
+        super().__init__(width, height, capacity)
+        self.ship = np.zeros(capacity, np.int8)
+        self.rng = rng
+
+    def spawn(self, player_ship_index):
+        # Escolhe uma nave diferente da do jogador
+        available_ships = [i for i in range(len(ship_sprites)) if i != player_ship_index]
+        ship_index = self.rng.choice(available_ships)
+        x = self.rng.randint(0, WIDTH - 30)
+        slot = self.add(x, -30, self.rng.randint(2, 6))
+        self.ship[slot] = ship_index
+        return slot
+
+    def update(self):
+        alive = self.alive
+        self.y[alive] += self.speed[alive]
+        # Quem saiu da tela volta ao topo, sorteando na ordem de criação
+        out = np.flatnonzero(alive & (self.y > HEIGHT))
+        if len(out):
+            for slot in out[np.argsort(self.order[out], kind='stable')].tolist():
+                self.x[slot] = self.rng.randint(0, WIDTH - 30)
+                self.y[slot] = -30
+                self.speed[slot] = self.rng.randint(2, 6)
+
+    def images(self, slots):
+        return [enemy_sprites[ship] for ship in self.ship[slots].tolist()]
+
+# Tiros em arrays: sobem com a velocidade de Bullet e somem ao sair da tela
+class BulletStore(EntityStore):
+    def __init__(self, capacity=64):
+        self.image = get_sprite('projectile', (12, 12))
+        width, height = self.image.get_size()
+        super().__init__(width, height, capacity)
+
+    def spawn(self, centerx, bottom):
+        return self.add(centerx - self.width // 2, bottom - self.height, -10)
+
+    def update(self):
+        alive = self.alive
+        self.y[alive] += self.speed[alive]
+        self.kill(np.flatnonzero(alive & (self.y + self.height < 0)))
+
+# Interpolação entre dois passos da simulação: capture() guarda o centro de
+# cada sprite antes do passo e, no desenho, cada um fica em
+# anterior + (atual - anterior) * alpha. Sprites novos e saltos grandes
+# (inimigo que volta ao topo, nave que revive) ficam na posição atual.
+INTERPOLATION_MAX_JUMP = 64
+
+class Interpolation:
+    def __init__(self):
+        self.previous = {}
+        self.alpha = 1.0
+
+    def capture(self, state):
+        self.previous = {}
+        for layer in state.draw_layers():
+            for member in layer.members:
+                if isinstance(member, pygame.sprite.AbstractGroup):
+                    for sprite in member:
+                        self.previous[sprite] = sprite.rect.center
+                else:
+                    member.capture()
+
+    def rect(self, sprite):
+        rect = sprite.rect.copy()
+        previous = self.previous.get(sprite)
+        if previous is None or self.alpha >= 1:
+            return rect
+        x, y = rect.center
+        prev_x, prev_y = previous
+        if abs(x - prev_x) <= INTERPOLATION_MAX_JUMP and abs(y - prev_y) <= INTERPOLATION_MAX_JUMP:
+            rect.center = (round(prev_x + (x - prev_x) * self.alpha), round(prev_y + (y - prev_y) * self.alpha))
+        return rect
+
+# Lista (imagem, posição) para desenhar uma camada da cena, um grupo de
+# sprites ou um EntityStore
+def blit_sequence(layer, interpolation=None):
+    if isinstance(layer, SceneLayer):
+        return [item for member in layer.members for item in blit_sequence(member, interpolation)]
+    if isinstance(layer, ExplosionGroup):
+        sequence = layer.blit_sequence()
+    elif isinstance(layer, pygame.sprite.AbstractGroup):
+        if interpolation:
+            sequence = [(sprite.image, interpolation.rect(sprite)) for sprite in layer]
+        else:
+            sequence = [(sprite.image, sprite.rect) for sprite in layer]
+    else:
+        sequence = layer.blit_sequence(interpolation.alpha if interpolation else 1.0)
+    if surface_checker:
+        surface_checker.check(sequence)
+    return sequence
+
+# Camada da cena: grupos de sprites e EntityStores atualizados e desenhados
+# juntos. Cada sprite pertence a uma camada só, então é atualizado e desenhado
+# uma vez por frame (os grupos de colisão, como enemies, podem repetir
+# sprites, mas não são camadas). A cena completa, de baixo para cima, é
+# SCENE_LAYERS: o fundo (estrelas) e o HUD são desenhados pelo Renderer, as
+# camadas do meio vêm de GameState.draw_layers().
+SCENE_LAYERS = ['background', 'entities', 'effects', 'hud']
+
+class SceneLayer:
+    def __init__(self, name, *members):
+        self.name = name
+        self.members = list(members)
+
+    def update(self):
+        for member in self.members:
+            member.update()
+
+    def __len__(self):
+        return sum(len(member) for member in self.members)
+
+# Área em pixels de uma lista de blits (imagem, posição[, área])
+def sequence_area(sequence):
+    area = 0
+    for item in sequence:
+        if len(item) > 2:
+            area += item[2].width * item[2].height
+        else:
+            width, height = item[0].get_size()
+            area += width * height
+    return area
+
+def rects_area(rects):
+    return sum(rect.width * rect.height for rect in rects)
+
+# Retângulos cortados pelos limites de bounds (os vazios são descartados)
+def clip_rects(rects, bounds):
+    clipped = [bounds.clip(rect) for rect in rects]
+    return [rect for rect in clipped if rect.width and rect.height]
+
+# Broadphase de colisões: grade uniforme (spatial hash) montada uma vez por
+# frame, com células separadas por grupo, então uma consulta só vê os sprites
+# do grupo pedido. Cada sprite entra em uma célula só (a do canto superior
+# esquerdo) e a consulta aumenta o rect pelo tamanho do maior sprite do grupo;
+# o teste de retângulo dentro de cada célula é um Rect.collidelistall (em C).
+# Os acertos saem na mesma ordem e com o mesmo teste de
+# pygame.sprite.spritecollide/groupcollide. Grupos com menos de
+# COLLISION_GRID_MIN sprites não ganham grade (a varredura direta é mais
+# rápida). No modo "mask" o teste fino entre naves (sprites com máscara) usa
+# pygame.sprite.collide_mask.
+COLLISION_GRID_MIN = 64
+
+# Chave inteira de uma célula (tuplas criadas aos milhares por frame
+# acordam o coletor de lixo)
+def cell_key(cx, cy):
+    return cx * 4096 + cy
+
+class SpatialHash:
+    def __init__(self, cell_size=COLLISION_CELL, mode=COLLISION_MODE):
+        self.cell_size = cell_size
+        self.mode = mode
+        self.grids = {}    # grupo -> {célula: ([sprites], [rects])}, ou None sem grade
+        self.extents = {}  # grupo -> [maior largura, maior altura]
+        self.order = {}    # sprite -> ordem de inserção (a mesma do grupo)
+        self.keys = {}     # sprite -> célula onde está
+        self.counter = 0
+
+    def clear(self):
+        self.grids.clear()
+        self.extents.clear()
+        self.order.clear()
+        self.keys.clear()
+        self.counter = 0
+
+    def build(self, *groups):
+        self.clear()
+        size = self.cell_size
+        order = self.order
+        keys = self.keys
+        for group in groups:
+            if len(group) < COLLISION_GRID_MIN:
+                self.grids[group] = None
+                continue
+            cells = self.grids[group] = {}
+            width = height = 0
+            counter = self.counter
+            for sprite in group:
+                rect = sprite.rect
+                key = cell_key(rect.left // size, rect.top // size)
+                order[sprite] = counter
+                keys[sprite] = key
+                counter += 1
+                cell = cells.get(key)
+                if cell is None:
+                    cells[key] = ([sprite], [rect])
+                else:
+                    cell[0].append(sprite)
+                    cell[1].append(rect)
+                if rect.width > width:
+                    width = rect.width
+                if rect.height > height:
+                    height = rect.height
+            self.counter = counter
+            self.extents[group] = [width, height]
+
+    # Sprites criados depois do build (ex.: inimigos novos) são inseridos aqui;
+    # um sprite reaproveitado no mesmo frame sai da célula antiga
+    def insert(self, sprite, group):
+        cells = self.grids.get(group)
+        if cells is None:
+            return
+        key = self.keys.get(sprite)
+        if key is not None:
+            sprites, rects = cells[key]
+            index = sprites.index(sprite)
+            del sprites[index]
+            del rects[index]
+        rect = sprite.rect
+        key = self.keys[sprite] = cell_key(rect.left // self.cell_size, rect.top // self.cell_size)
+        self.order[sprite] = self.counter
+        self.counter += 1
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = ([sprite], [rect])
+        else:
+            cell[0].append(sprite)
+            cell[1].append(rect)
+        extent = self.extents[group]
+        extent[0] = max(extent[0], rect.width)
+        extent[1] = max(extent[1], rect.height)
+
+    # Sprites vivos do grupo que tocam rect. Com first=True devolve só o
+    # primeiro deles na ordem do grupo (ou None); senão todos, nessa ordem
+    def query(self, rect, group, first=False):
+        cells = self.grids[group]
+        if cells is None:
+            found = [other for other in group if rect.colliderect(other.rect)]
+            if first:
+                return found[0] if found else None
+            return found
+        width, height = self.extents[group]
+        size = self.cell_size
+        found = []
+        merged = False
+        top = (rect.top - height + 1) // size
+        bottom = (rect.bottom - 1) // size + 1
+        for cx in range((rect.left - width + 1) // size, (rect.right - 1) // size + 1):
+            for key in range(cell_key(cx, top), cell_key(cx, bottom)):
+                cell = cells.get(key)
+                if cell is None:
+                    continue
+                hits = rect.collidelistall(cell[1])
+                if not hits:
+                    continue
+                sprites = cell[0]
+                # Sprites mortos continuam na grade até o próximo build
+                if first:
+                    # A célula está na ordem do grupo: basta o primeiro vivo
+                    for index in hits:
+                        if group.has_internal(sprites[index]):
+                            found.append(sprites[index])
+                            break
+                    continue
+                merged = merged or bool(found)
+                found += [sprites[index] for index in hits if group.has_internal(sprites[index])]
+        if first:
+            return min(found, key=self.order.__getitem__) if found else None
+        if merged:
+            found.sort(key=self.order.__getitem__)
+        return found
+
+    # Teste fino do modo "mask" (só entre sprites com máscara)
+    def collided(self, sprite, other):
+        if self.mode != "mask" or not hasattr(sprite, 'mask') or not hasattr(other, 'mask'):
+            return True
+        return pygame.sprite.collide_mask(sprite, other)
+
+    # Equivalente a pygame.sprite.spritecollide(sprite, group, dokill)
+    def collide(self, sprite, group, dokill=False):
+        hits = self.query(sprite.rect, group)
+        if self.mode == "mask":
+            hits = [other for other in hits if self.collided(sprite, other)]
+        if dokill:
+            for other in hits:
+                other.kill()
+        return hits
+
+    # Equivalente a pygame.sprite.groupcollide(groupa, groupb, dokilla,
+    # dokillb). Percorre o grupo b (os tiros, em geral o menor) contra a grade
+    # do grupo a; com dokillb cada sprite de b fica só com o primeiro sprite
+    # de a que toca, como no pygame, onde ele morre no primeiro acerto
+    def groupcollide(self, groupa, groupb, dokilla, dokillb):
+        if self.grids[groupa] is None:
+            collided = None
+            if self.mode == "mask":
+                collided = lambda sprite, other: sprite.rect.colliderect(other.rect) and self.collided(sprite, other)
+            return pygame.sprite.groupcollide(groupa, groupb, dokilla, dokillb, collided)
+        result = {}
+        first = dokillb and self.mode != "mask"
+        for other in groupb.sprites():
+            if first:
+                sprite = self.query(other.rect, groupa, True)
+                hits = [sprite] if sprite else ()
+            else:
+                hits = [sprite for sprite in self.query(other.rect, groupa) if self.collided(sprite, other)]
+                if dokillb:
+                    hits = hits[:1]
+            for sprite in hits:
+                if sprite in result:
+                    result[sprite].append(other)
+                else:
+                    result[sprite] = [other]
+        if len(result) > 1:
+            result = dict(sorted(result.items(), key=lambda item: self.order[item[0]]))
+        for sprite, others in result.items():
+            if dokilla:
+                sprite.kill()
+            if dokillb:
+                for other in others:
+                    other.kill()
+        return result
+
+# Classe da Explosão com efeito ripple. Os quadros da animação são
+# pré-renderizados uma vez por (raio máximo, velocidade) e compartilhados por
+# todas as explosões, então várias explosões simultâneas não alocam nada.
+EXPLOSION_RADIUS = 300
+EXPLOSION_SPEED = 8
+EXPLOSION_RINGS = 3
+explosion_frames = {}
+# Fração do raio máximo até onde as explosões são desenhadas; a qualidade
+# automática diminui em máquinas lentas (a explosão continua igual na
+# simulação, só os últimos quadros, os maiores, deixam de ser desenhados)
+explosion_detail = 1.0
+# Imagem vazia usada antes do primeiro quadro
+blank_sprite = pygame.Surface((0, 0))
+
+def get_explosion_frames(max_radius, speed, rings=EXPLOSION_RINGS):
+    key = (max_radius, speed, rings)
+    frames = explosion_frames.get(key)
+    if frames is None:
+        frames = []
+        radius = speed
+        while radius <= max_radius:
+            alpha = max(0, 255 - (radius / max_radius * 255))
+            # Cada quadro só tem o tamanho do maior círculo
+            size = radius * 2 + 2
+            center = (radius + 1, radius + 1)
+            frame = pygame.Surface((size, size))
+            count_alloc('surfaces')
+            frame.set_colorkey(BLACK, pygame.RLEACCEL)
+            frame.set_alpha(int(alpha))
+            # Desenha círculos concêntricos para efeito ripple
+            for i in range(rings):
+                ripple_radius = radius - (i * 20)
+                if ripple_radius > 0:
+                    color_intensity = max(0, alpha - (i * 50))
+                    color = (255, min(255, 200 + color_intensity), 0)  # Amarelo-laranja
+                    pygame.draw.circle(frame, color, center, int(ripple_radius), 3)
+            frames.append(frame)
+            radius += speed
+        explosion_frames[key] = frames
+    return frames
+
 class Explosion(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    def __init__(self, x, y, max_radius=EXPLOSION_RADIUS, speed=EXPLOSION_SPEED):
         super().__init__()
         self.x = x
         self.y = y
         self.radius = 0
-        self.max_radius = 300
-        self.speed = 8
+        self.max_radius = max_radius
+        self.speed = speed
         self.alpha = 255
-        self.image = pygame.Surface((self.max_radius * 2, self.max_radius * 2))
-        self.image.set_colorkey(BLACK)
-        self.image.set_alpha(self.alpha)
+        self.frames = get_explosion_frames(max_radius, speed)
+        self.frame = 0
+        self.image = blank_sprite
         self.rect = self.image.get_rect()
         self.rect.center = (x, y)
 
@@ -365,261 +1450,1608 @@ class Explosion(pygame.sprite.Sprite):
         if self.radius > self.max_radius:
             self.kill()
         else:
-            # Cria a imagem da explosão ripple
-            self.image = pygame.Surface((self.max_radius * 2, self.max_radius * 2))
-            self.image.set_colorkey(BLACK)
-            self.image.set_alpha(self.alpha)
-            
-            # Desenha círculos concêntricos para efeito ripple
-            for i in range(3):
-                ripple_radius = self.radius - (i * 20)
-                if ripple_radius > 0:
-                    color_intensity = max(0, self.alpha - (i * 50))
-                    color = (255, min(255, 200 + color_intensity), 0)  # Amarelo-laranja
-                    pygame.draw.circle(self.image, color, (self.max_radius, self.max_radius), int(ripple_radius), 3)
-            
-            self.rect = self.image.get_rect()
+            # Usa o próximo quadro pré-renderizado (o quadro n tem raio n * speed)
+            self.frame += 1
+            self.image = self.frames[self.frame - 1]
+            self.rect.size = self.image.get_size()
             self.rect.center = (self.x, self.y)
 
+# Grupo das explosões da cena: desenha só as que ainda estão dentro de
+# explosion_detail (não há interpolação, a explosão não se move)
+class ExplosionGroup(pygame.sprite.Group):
+    def blit_sequence(self):
+        return [(explosion.image, explosion.rect) for explosion in self
+                if explosion.radius <= explosion.max_radius * explosion_detail]
+
+# Pré-renderiza a explosão padrão junto com as outras sprites
+get_explosion_frames(EXPLOSION_RADIUS, EXPLOSION_SPEED)
+
 
 # Classe para partículas de estrelas de fundo
 class Star:
-    def __init__(self):
-        self.x = random.randint(0, WIDTH-1)
-        self.y = random.randint(0, HEIGHT-1)
-        self.speed = random.uniform(0.5, 2.0)
-        self.size = random.choice([1, 2])
-        self.color = (random.randint(180,255), random.randint(180,255), random.randint(180,255))
+    def __init__(self, rng=random):
+        self.rng = rng
+        self.x = rng.randint(0, WIDTH-1)
+        self.y = rng.randint(0, HEIGHT-1)
+        self.speed = rng.uniform(0.5, 2.0)
+        self.size = rng.choice([1, 2])
+        self.color = (rng.randint(180,255), rng.randint(180,255), rng.randint(180,255))
 
     def update(self):
         self.y += self.speed
         if self.y > HEIGHT:
-            self.x = random.randint(0, WIDTH-1)
+            rng = self.rng
+            self.x = rng.randint(0, WIDTH-1)
             self.y = 0
-            self.speed = random.uniform(0.5, 2.0)
-            self.size = random.choice([1, 2])
-            self.color = (random.randint(180,255), random.randint(180,255), random.randint(180,255))
+            self.speed = rng.uniform(0.5, 2.0)
+            self.size = rng.choice([1, 2])
+            self.color = (rng.randint(180,255), rng.randint(180,255), rng.randint(180,255))
 
     def draw(self, surface):
         pygame.draw.rect(surface, self.color, (self.x, int(self.y), self.size, self.size))
 
-# Função principal do jogo com suporte a multiplayer
-def main():
-    while True:
-        # Home screen: escolha 1 ou 2 jogadores
-        num_players = select_num_players()
+# Campo de estrelas vetorizado: posições, velocidades, tamanhos e cores ficam
+# em arrays NumPy, atualizados de uma vez e escritos direto nos pixels da tela.
+# Sem NumPy usa uma lista de Star com o mesmo comportamento. Só as primeiras
+# `visible` estrelas são desenhadas (a qualidade automática reduz esse número).
+STAR_COUNT = 80
+# Save states: quantidade de estrelas, estado do PCG64 (inteiros de 128 bits)
+# e um registro por estrela
+STARS_HEADER = struct.Struct("<I16s16sBI")
+STAR_DTYPE = np.dtype([('x', '<i2'), ('y', '<f8'), ('speed', '<f8'), ('size', 'u1'), ('color', 'u1', 3)]) \
+    if np is not None else None
+
+class Starfield:
+    def __init__(self, count=STAR_COUNT, seed=None):
+        self.count = count
+        self.visible = count
+        if np is None:
+            rng = random.Random(seed)
+            self.stars = [Star(rng) for _ in range(count)]
+            return
+        self.rng = np.random.default_rng(seed)
+        self.x = self.rng.integers(0, WIDTH, count)
+        self.y = self.rng.integers(0, HEIGHT, count).astype(float)
+        self.speed = self.rng.uniform(0.5, 2.0, count)
+        self.size = self.rng.choice([1, 2], count)
+        self.color = self.rng.integers(180, 256, (count, 3)).astype(np.uint8)
+
+    def update(self):
+        if np is None:
+            for star in self.stars:
+                star.update()
+            return
+        self.y += self.speed
+        # Estrelas que saíram da tela voltam ao topo com novos valores
+        out = np.flatnonzero(self.y > HEIGHT)
+        if len(out):
+            self.x[out] = self.rng.integers(0, WIDTH, len(out))
+            self.y[out] = 0
+            self.speed[out] = self.rng.uniform(0.5, 2.0, len(out))
+            self.size[out] = self.rng.choice([1, 2], len(out))
+            self.color[out] = self.rng.integers(180, 256, (len(out), 3))
+
+    # Estrelas e estado do gerador para os save states. Sem NumPy devolve
+    # b"" (as estrelas não entram no snapshot)
+    def snapshot(self):
+        if np is None:
+            return b""
+        rng = self.rng.bit_generator.state
+        header = STARS_HEADER.pack(self.count, rng['state']['state'].to_bytes(16, 'little'),
+                                   rng['state']['inc'].to_bytes(16, 'little'), rng['has_uint32'], rng['uinteger'])
+        records = np.empty(self.count, STAR_DTYPE)
+        records['x'] = self.x
+        records['y'] = self.y
+        records['speed'] = self.speed
+        records['size'] = self.size
+        records['color'] = self.color
+        return header + records.tobytes()
+
+    def restore(self, data):
+        if np is None:
+            return
+        count, state, inc, has_uint32, uinteger = STARS_HEADER.unpack_from(data)
+        if count != self.count:
+            return
+        state = {'state': int.from_bytes(state, 'little'), 'inc': int.from_bytes(inc, 'little')}
+        self.rng.bit_generator.state = {'bit_generator': 'PCG64', 'state': state,
+                                        'has_uint32': has_uint32, 'uinteger': uinteger}
+        records = np.frombuffer(data, STAR_DTYPE, count, STARS_HEADER.size)
+        self.x[:] = records['x']
+        self.y[:] = records['y']
+        self.speed[:] = records['speed']
+        self.size[:] = records['size']
+        self.color[:] = records['color']
+
+    # Retângulos ocupados pelas estrelas (usados pela renderização por áreas)
+    def rects(self):
+        n = self.visible
+        if np is None:
+            return [pygame.Rect(star.x, int(star.y), star.size, star.size) for star in self.stars[:n]]
+        return [pygame.Rect(x, y, size, size)
+                for x, y, size in zip(self.x[:n].tolist(), self.y[:n].astype(int).tolist(), self.size[:n].tolist())]
+
+    def draw(self, surface):
+        n = self.visible
+        if np is None:
+            for star in self.stars[:n]:
+                star.draw(surface)
+            return
+        size = self.size[:n]
+        color = self.color[:n]
+        try:
+            pixels = pygame.surfarray.pixels3d(surface)
+        except (ValueError, pygame.error):
+            # Formato de pixel sem acesso direto: desenha estrela por estrela
+            for x, y, star_size, star_color in zip(self.x[:n], self.y[:n].astype(int), size, color):
+                surface.fill(star_color, (x, y, star_size, star_size))
+            return
+        width, height = pixels.shape[:2]
+        x = self.x[:n]
+        y = self.y[:n].astype(int)
+        visible = y < height
+        pixels[x[visible], y[visible]] = color[visible]
+        # Estrelas de tamanho 2 ocupam um quadrado 2x2
+        big = visible & (size == 2)
+        for dx, dy in ((1, 0), (0, 1), (1, 1)):
+            inside = big & (x + dx < width) & (y + dy < height)
+            pixels[x[inside] + dx, y[inside] + dy] = color[inside]
+        del pixels
+
+# Desenha os textos da tela de game over por cima das estrelas. leaderboard
+# (opcional) é o top-N de ScoreStore; a partida atual (current) fica em
+# amarelo, com o tempo e os power-ups dela embaixo do total de partidas
+# (sessions) guardadas
+def draw_game_over(screen, score_text, leaderboard=None, current=None, sessions=None):
+    blit_text(screen, "GAME OVER", 96, RED, (WIDTH//2, HEIGHT//2 - 100))
+    screen.blit(score_text, score_text.get_rect(center=(WIDTH//2, HEIGHT//2)))
+    blit_text(screen, "Pressione ENTER ou ESPAÇO para jogar novamente", 40, WHITE, (WIDTH//2, HEIGHT//2 + 80))
+    blit_text(screen, "Pressione ESC para sair", 40, WHITE, (WIDTH//2, HEIGHT//2 + 130))
+    if leaderboard:
+        x = WIDTH - 170
+        y = HEIGHT//2 - 150
+        blit_text(screen, "RECORDES", 40, WHITE, (x, y))
+        for rank, entry in enumerate(leaderboard, 1):
+            color = YELLOW if entry is current else WHITE
+            players = "2P" if entry['players'] == 2 else "1P"
+            blit_text(screen, f"{rank}. {entry['score']:>6}  {players}", 32, color, (x, y + 10 + 30 * rank))
+        y += 10 + 30 * (len(leaderboard) + 2)
+        if sessions:
+            blit_text(screen, f"Partidas: {sessions}", 32, WHITE, (x, y))
+        if current:
+            seconds = current['frames'] // FPS
+            blit_text(screen, f"Tempo: {seconds // 60}:{seconds % 60:02}", 32, YELLOW, (x, y + 30))
+            blit_text(screen, f"Vida: {current['health_powerups']}  Bomba: {current['bomb_powerups']}", 32, YELLOW,
+                      (x, y + 60))
+
+# Medição de tempo por fase do frame (eventos, estrelas, update, spawn,
+# colisões, gravação e rewind, desenho e flip). Mostra um overlay com os percentis do tempo de
+# frame e o número de sprites por grupo, e pode gravar uma linha por frame em
+# CSV (.csv) ou JSON Lines (qualquer outra extensão). Desligado, o jogo usa
+# NULL_PROFILER, cujos métodos não fazem nada.
+PROFILE_PHASES = ['events', 'stars', 'update', 'spawn', 'grid', 'collide_bullets', 'collide_enemies',
+                  'collide_health', 'collide_bombs', 'history', 'draw', 'flip']
+PROFILE_GROUPS = ['enemies', 'bullets', 'health_powerups', 'bomb_powerups', 'explosions', 'spawn_queue']
+PROFILE_REFRESH = 30  # frames entre atualizações do overlay
+# Por camada da cena: blits (e fills) e área desenhada em pixels no frame
+PROFILE_LAYERS = [f"{layer}_{counter}" for layer in SCENE_LAYERS for counter in ('blits', 'area')]
+
+class FrameProfiler:
+    counting = True  # o Renderer só mede as camadas quando alguém vai ler
+
+    def __init__(self, out_path=None, window=300, overlay=True):
+        self.window = deque(maxlen=window)
+        self.phases = dict.fromkeys(PROFILE_PHASES, 0.0)
+        self.layers = dict.fromkeys(PROFILE_LAYERS, 0)
+        self.frame = 0
+        self.start = 0.0
+        self.last = 0.0
+        self.overlay = overlay
+        self.overlay_surface = None
+        self.out = None
+        self.writer = None
+        if out_path:
+            self.out = open(out_path, "w", newline="")
+            if out_path.endswith(".csv"):
+                self.writer = csv.writer(self.out)
+                self.writer.writerow(['frame', 'total'] + PROFILE_PHASES + PROFILE_GROUPS + PROFILE_LAYERS + ['surfaces'])
+
+    def begin_frame(self):
+        for phase in self.phases:
+            self.phases[phase] = 0.0
+        for counter in self.layers:
+            self.layers[counter] = 0
+        self.start = self.last = time.perf_counter()
+
+    def count_layer(self, layer, blits, area):
+        self.layers[f"{layer}_blits"] += blits
+        self.layers[f"{layer}_area"] += area
+
+    # Soma o tempo desde a marca anterior na fase indicada
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self, state):
+        self.frame += 1
+        total = self.last - self.start
+        times = [self.phases[phase] for phase in PROFILE_PHASES]
+        counts = [len(getattr(state, group)) for group in PROFILE_GROUPS]
+        layers = [self.layers[counter] for counter in PROFILE_LAYERS]
+        self.window.append((total, times, counts))
+        if self.writer:
+            self.writer.writerow([self.frame, total] + times + counts + layers + [frame_allocs['surfaces']])
+        elif self.out:
+            row = {'frame': self.frame, 'total': total, 'surfaces': frame_allocs['surfaces']}
+            row.update(zip(PROFILE_PHASES, times))
+            row.update(zip(PROFILE_GROUPS, counts))
+            row.update(zip(PROFILE_LAYERS, layers))
+            self.out.write(json.dumps(row) + "\n")
+        if self.overlay and self.frame % PROFILE_REFRESH == 1:
+            self.overlay_surface = None
+
+    def percentiles(self, *points):
+        totals = sorted(total for total, times, counts in self.window)
+        if not totals:
+            return [0.0 for point in points]
+        return [totals[min(len(totals) - 1, int(len(totals) * point / 100))] for point in points]
+
+    def overlay_lines(self):
+        p50, p95, p99 = self.percentiles(50, 95, 99)
+        lines = [f"frame ms  p50 {p50 * 1000:.2f}  p95 {p95 * 1000:.2f}  p99 {p99 * 1000:.2f}"]
+        count = len(self.window) or 1
+        for idx, phase in enumerate(PROFILE_PHASES):
+            mean = sum(times[idx] for total, times, counts in self.window) / count
+            lines.append(f"{phase:<16} {mean * 1000:.3f} ms")
+        if self.window:
+            counts = self.window[-1][2]
+            lines.append("  ".join(f"{group} {n}" for group, n in zip(PROFILE_GROUPS, counts)))
+        lines.append("  ".join(f"{layer} {self.layers[layer + '_blits']}/{self.layers[layer + '_area'] / 1000:.0f}k px"
+                               for layer in SCENE_LAYERS))
+        if startup_times:
+            lines.append("  ".join(f"{name} {ms:.0f} ms" for name, ms in startup_times.items()))
+        return lines
+
+    # Reconstrói o overlay a cada PROFILE_REFRESH frames
+    def draw_overlay(self, screen):
+        if not self.overlay:
+            return None
+        if self.overlay_surface is None:
+            font = get_font(22)
+            lines = [font.render(line, True, (0, 255, 0)) for line in self.overlay_lines()]
+            width = max(line.get_width() for line in lines) + 10
+            self.overlay_surface = pygame.Surface((width, len(lines) * 18 + 10), pygame.SRCALPHA)
+            self.overlay_surface.fill((0, 0, 0, 160))
+            for idx, line in enumerate(lines):
+                self.overlay_surface.blit(line, (5, 5 + idx * 18))
+        return screen.blit(self.overlay_surface, (10, 70))
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self.overlay_surface = None
+
+    def close(self):
+        if self.out:
+            self.out.close()
+            self.out = None
+        if startup_times:
+            print("Inicialização: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in startup_times.items()))
+
+class NullProfiler:
+    counting = False
+
+    def begin_frame(self):
+        pass
+
+    def count_layer(self, layer, blits, area):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self, state):
+        pass
+
+    def draw_overlay(self, screen):
+        return None
+
+    def toggle_overlay(self):
+        pass
+
+    def close(self):
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+# Power-ups: a cada tantos frames, chance (em %) de aparecer um novo
+HEALTH_SPAWN_FRAMES = 600
+HEALTH_SPAWN_CHANCE = 30
+BOMB_SPAWN_FRAMES = 900
+BOMB_SPAWN_CHANCE = 15
+
+# Agenda de spawns. As regras vêm de um arquivo JSON (--waves) ou de
+# default_wave_config(), que reproduz o jogo original: 5 inimigos no início,
+# um novo a cada inimigo destruído, 5 depois da bomba e os power-ups das
+# constantes acima. As ondas nascem em formação e podem se repetir crescendo
+# (curva de dificuldade). Os eventos ficam em filas de prioridade (heapq) por
+# frame e no máximo max_spawns_per_frame inimigos nascem por frame; o resto
+# espera os próximos frames, para uma onda de centenas de inimigos não
+# estourar o tempo de frame.
+WAVE_FORMATIONS = ['random', 'line', 'column', 'v', 'grid']
+WAVE_DEFAULTS = {'count': 1, 'formation': 'random', 'x': WIDTH // 2, 'spacing': 80, 'columns': 10,
+                 'interval': 0, 'speed': None, 'repeat': 0, 'times': 1, 'grow': 0}
+RESPAWN_PRIORITY = 0  # inimigos adiados pelo limite nascem antes das ondas
+
+def default_wave_config():
+    return {
+        'initial_enemies': 5,
+        'respawn_on_kill': 1,
+        'bomb_respawn': 5,
+        'max_spawns_per_frame': 64,
+        'powerups': [
+            {'kind': 'health', 'every': HEALTH_SPAWN_FRAMES, 'chance': HEALTH_SPAWN_CHANCE},
+            {'kind': 'bomb', 'every': BOMB_SPAWN_FRAMES, 'chance': BOMB_SPAWN_CHANCE},
+        ],
+        'waves': [],
+    }
+
+# Lê um arquivo de ondas; o que faltar vem de default_wave_config()
+def load_wave_config(path):
+    with open(path) as f:
+        config = default_wave_config()
+        config.update(json.load(f))
+    for powerup in config['powerups']:
+        if powerup.get('kind') not in ('health', 'bomb'):
+            raise ValueError(f"{path}: power-up desconhecido: {powerup.get('kind')}")
+    for wave in config['waves']:
+        if 'frame' not in wave:
+            raise ValueError(f"{path}: onda sem 'frame'")
+        if wave.get('formation', 'random') not in WAVE_FORMATIONS:
+            raise ValueError(f"{path}: formação desconhecida: {wave['formation']}")
+    return config
+
+# Posições (canto superior esquerdo) dos inimigos de uma formação, acima da
+# tela; None deixa o inimigo sortear a própria posição
+def formation_positions(wave, count):
+    size = enemy_sprites[0].get_width()
+    formation = wave['formation']
+    spacing = wave['spacing']
+    x = wave['x'] - size // 2
+    if formation == 'random':
+        return [None] * count
+    positions = []
+    for i in range(count):
+        if formation == 'line':
+            position = (x + (i - (count - 1) / 2) * spacing, 0)
+        elif formation == 'column':
+            position = (x, i * spacing)
+        elif formation == 'v':
+            side = 1 if i % 2 else -1
+            step = (i + 1) // 2
+            position = (x + side * step * spacing, step * spacing)
+        else:
+            columns = min(wave['columns'], count)
+            row, column = divmod(i, columns)
+            position = (x + (column - (columns - 1) / 2) * spacing, row * spacing)
+        px = max(0, min(WIDTH - size, int(position[0])))
+        positions.append((px, -size - int(position[1])))
+    return positions
+
+class WaveScheduler:
+    def __init__(self, config, rng):
+        self.config = config
+        self.rng = rng
+        # Eventos sem limite por frame (power-ups e o início de cada onda)
+        # e fila de inimigos a nascer: (frame, prioridade, ordem, dados)
+        self.timers = []
+        self.queue = []
+        self.order = 0
+        self.budget = config['max_spawns_per_frame']
+        self.spawned = 0  # inimigos criados no frame atual
+        # Identifica a configuração nos save states
+        self.config_crc = zlib.crc32(json.dumps(config, sort_keys=True).encode())
+        # A prioridade de cada evento é o índice da regra (power-ups primeiro)
+        self.waves = [dict(WAVE_DEFAULTS, **wave) for wave in config['waves']]
+        for idx, powerup in enumerate(config['powerups']):
+            self.push(self.timers, powerup['every'], idx, ('powerup', powerup))
+        for idx, wave in enumerate(self.waves):
+            self.push(self.timers, wave['frame'], len(config['powerups']) + idx, ('wave', wave, 0))
+
+    def push(self, heap, frame, priority, data):
+        heapq.heappush(heap, (frame, priority, self.order, data))
+        self.order += 1
+
+    def __len__(self):
+        return len(self.queue)
+
+    # Chamado uma vez por frame, depois do movimento
+    def update(self, state):
+        self.budget = self.config['max_spawns_per_frame']
+        self.spawned = 0
+        frame = state.frame
+        while self.timers and self.timers[0][0] <= frame:
+            _, priority, _, data = heapq.heappop(self.timers)
+            if data[0] == 'powerup':
+                self.spawn_powerup(state, data[1])
+                self.push(self.timers, frame + data[1]['every'], priority, data)
+            else:
+                self.start_wave(state, priority, data[1], data[2])
+        while self.queue and self.queue[0][0] <= frame and self.budget > 0:
+            _, _, _, (position, speed) = heapq.heappop(self.queue)
+            self.spawn(state, position, speed)
+
+    def spawn_powerup(self, state, powerup):
+        if self.rng.randint(1, 100) <= powerup['chance']:
+            if powerup['kind'] == 'health':
+                item = HealthPowerup(self.rng)
+                state.health_powerups.add(item)
+            else:
+                item = BombPowerup(self.rng)
+                state.bomb_powerups.add(item)
+            state.all_sprites.add(item)
+
+    # Coloca os inimigos da onda na fila e agenda a próxima repetição
+    def start_wave(self, state, priority, wave, repetition):
+        count = wave['count'] + wave['grow'] * repetition
+        speed = wave['speed']
+        for i, position in enumerate(formation_positions(wave, count)):
+            self.push(self.queue, state.frame + i * wave['interval'], priority, (position, speed))
+        repetition += 1
+        if wave['repeat'] and (wave['times'] < 0 or repetition < wave['times']):
+            self.push(self.timers, state.frame + wave['repeat'], priority, ('wave', wave, repetition))
+
+    def spawn(self, state, position=None, speed=None):
+        if isinstance(speed, list):
+            speed = self.rng.randint(*speed)
+        state.spawn_enemy(position, speed)
+        self.budget -= 1
+        self.spawned += 1
+
+    # Reposição de inimigos (depois de um acerto ou da bomba): nasce agora
+    # se ainda houver espaço no limite do frame, senão no próximo
+    def respawn(self, state, count):
+        for _ in range(count):
+            if self.budget > 0:
+                self.spawn(state)
+            else:
+                self.push(self.queue, state.frame + 1, RESPAWN_PRIORITY, (None, None))
+
+# Estado da simulação, separado da renderização: step(inputs) avança um frame
+# fixo (1/FPS) a partir dos bits de input de cada jogador, sem ler o teclado
+# nem desenhar na tela. Com SDL_VIDEODRIVER=dummy roda sem janela. Todo o
+# sorteio usa self.rng, então a mesma semente e os mesmos inputs reproduzem
+# exatamente a mesma partida. Com entity_store=True (e NumPy instalado),
+# inimigos e tiros ficam em EnemyStore/BulletStore em vez de grupos de
+# sprites; nesse modo a colisão com as naves é sempre por retângulo.
+class GameState:
+    def __init__(self, player1_ship_index, player2_ship_index=None, seed=None, entity_store=False, waves=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.player1_ship_index = player1_ship_index
+        self.player2_ship_index = player2_ship_index
+        self.player_ship_index = player1_ship_index
+        self.num_players = 1 if player2_ship_index is None else 2
+
+        # Cria jogadores
+        self.player1 = Player(player1_ship_index, start_pos=PLAYER1_START)
+        if self.num_players == 2:
+            self.player2 = Player(player2_ship_index, start_pos=PLAYER2_START)
+        else:
+            self.player2 = None
+        self.players = [self.player1, self.player2] if self.player2 else [self.player1]
+
+        self.all_sprites = pygame.sprite.Group()
+        self.entity_store = entity_store and np is not None
+        if self.entity_store:
+            self.enemies = EnemyStore(self.rng)
+            self.bullets = BulletStore()
+            self.entity_stores = [self.enemies, self.bullets]
+        else:
+            self.enemies = pygame.sprite.Group()
+            self.bullets = pygame.sprite.Group()
+            self.entity_stores = []
+        self.health_powerups = pygame.sprite.Group()
+        self.bomb_powerups = pygame.sprite.Group()
+        self.explosions = ExplosionGroup()
+        self.all_sprites.add(self.players)
+        # Camadas atualizadas e desenhadas (as explosões ficam só em effects)
+        self.layers = [SceneLayer('entities', self.all_sprites, *self.entity_stores),
+                       SceneLayer('effects', self.explosions)]
+
+        self.enemy_pool = EnemyPool(self.rng)
+        self.grid = SpatialHash()
+        # Ondas e spawns (None = regras do jogo original, ver WaveScheduler)
+        self.waves = waves
+        self.scheduler = WaveScheduler(waves or default_wave_config(), self.rng)
+        for _ in range(self.scheduler.config['initial_enemies']):
+            self.spawn_enemy()
+        self.score = 0
+        self.frame = 0
+        self.running = True
+        self.profiler = NULL_PROFILER
+        # Power-ups coletados na partida
+        self.stats = {'health_powerups': 0, 'bomb_powerups': 0}
+
+    # position e speed (opcionais) substituem o sorteio do inimigo
+    def spawn_enemy(self, position=None, speed=None):
+        if self.entity_store:
+            slot = self.enemies.spawn(self.player_ship_index)
+            if position:
+                self.enemies.place(slot, position)
+            if speed:
+                self.enemies.speed[slot] = speed
+            return slot
+        enemy = self.enemy_pool.acquire(self.player_ship_index)
+        if position:
+            enemy.rect.topleft = position
+        if speed:
+            enemy.speed = speed
+        self.all_sprites.add(enemy)
+        self.enemies.add(enemy)
+        # Inimigos criados durante as colisões entram na grade do frame
+        self.grid.insert(enemy, self.enemies)
+        return enemy
+
+    def fire(self, player):
+        if self.entity_store:
+            self.bullets.spawn(player.rect.centerx, player.rect.top)
+            return
+        bullet = Bullet(player.rect.centerx, player.rect.top)
+        self.all_sprites.add(bullet)
+        self.bullets.add(bullet)
+
+    def step(self, inputs):
+        self.frame += 1
+        # Tiros e movimento (só para jogadores vivos)
+        for idx, player in enumerate(self.players):
+            player_inputs = inputs[idx] if idx < len(inputs) else 0
+            player.inputs = player_inputs
+            if not player.alive():
+                continue
+            shooting = bool(player_inputs & INPUT_SHOOT)
+            if shooting and not player.shoot_pressed and player.health > 0:
+                self.fire(player)
+            player.shoot_pressed = shooting
+
+        for layer in self.layers:
+            layer.update()
+        self.profiler.mark('update')
+
+        # Power-ups e ondas de inimigos agendados para este frame
+        self.scheduler.update(self)
+        self.profiler.mark('spawn')
+
+        # Monta a grade de colisão uma vez por frame
+        if self.entity_store:
+            self.grid.build(self.health_powerups, self.bomb_powerups)
+        else:
+            self.grid.build(self.enemies, self.health_powerups, self.bomb_powerups)
+        self.profiler.mark('grid')
+        self.collide_bullets()
+        self.profiler.mark('collide_bullets')
+        self.collide_enemies()
+        self.profiler.mark('collide_enemies')
+
+        # Check if all players are dead to end the game
+        if self.player2:
+            if self.player1.health <= 0 and self.player2.health <= 0:
+                self.running = False
+
+        self.collide_health_powerups()
+        self.profiler.mark('collide_health')
+        self.collide_bomb_powerups()
+        self.profiler.mark('collide_bombs')
+
+    # Colisões de tiros com inimigos
+    def collide_bullets(self):
+        if self.entity_store:
+            self.collide_bullet_store()
+            return
+        hits = self.grid.groupcollide(self.enemies, self.bullets, True, True)
+        for hit in hits:
+            self.score += 1
+            self.enemy_pool.release(hit)
+            self.scheduler.respawn(self, self.scheduler.config['respawn_on_kill'])
+
+    # Mesmo resultado de groupcollide(enemies, bullets, True, True): cada tiro
+    # acerta o primeiro inimigo (na ordem de criação) que ele toca
+    def collide_bullet_store(self):
+        enemies = self.enemies.active()
+        bullets = self.bullets.active()
+        if not len(enemies) or not len(bullets):
+            return
+        ex = self.enemies.x[enemies][:, None]
+        ey = self.enemies.y[enemies][:, None]
+        bx = self.bullets.x[bullets][None, :]
+        by = self.bullets.y[bullets][None, :]
+        hit = (ex < bx + self.bullets.width) & (bx < ex + self.enemies.width) & \
+              (ey < by + self.bullets.height) & (by < ey + self.enemies.height)
+        bullet_hit = hit.any(axis=0)
+        if not bullet_hit.any():
+            return
+        killed = enemies[np.unique(hit.argmax(axis=0)[bullet_hit])]
+        self.bullets.kill(bullets[bullet_hit])
+        self.enemies.kill(killed)
+        for _ in range(len(killed)):
+            self.score += 1
+            self.scheduler.respawn(self, self.scheduler.config['respawn_on_kill'])
+
+    # Colisão inimigos com jogadores
+    def collide_enemies(self):
+        for player in self.players:
+            if self.entity_store:
+                hits = int(self.enemies.overlaps(player.rect, self.enemies.active()).sum())
+                enemy_hits = range(hits)
+            else:
+                enemy_hits = self.grid.collide(player, self.enemies)
+            for enemy in enemy_hits:
+                if player.take_damage():
+                    if player.health <= 0:
+                        # Remove player from all sprite groups so he disappears
+                        player.kill()
+
+    # Colisão com power-ups de vida (aplica para todos os jogadores)
+    def collide_health_powerups(self):
+        for player in self.players:
+            health_hits = self.grid.collide(player, self.health_powerups, True)
+            for health_powerup in health_hits:
+                self.stats['health_powerups'] += 1
+                # Revive friend if possible
+                if self.num_players == 2 and player.health == player.max_health:
+                    friend = self.player2 if player is self.player1 else self.player1
+                    if friend and (not friend.alive() or friend.health <= 0):
+                        friend.health = 1
+                        if not friend.alive():
+                            self.all_sprites.add(friend)
+                        if friend is self.player1:
+                            friend.rect.centerx, friend.rect.bottom = PLAYER1_START
+                        else:
+                            friend.rect.centerx, friend.rect.bottom = PLAYER2_START
+                else:
+                    player.heal()
+
+    # Colisão com power-ups de bomba (aplica para todos os jogadores)
+    def collide_bomb_powerups(self):
+        for player in self.players:
+            bomb_hits = self.grid.collide(player, self.bomb_powerups, True)
+            for bomb_powerup in bomb_hits:
+                self.stats['bomb_powerups'] += 1
+                explosion = Explosion(WIDTH // 2, HEIGHT // 2)
+                self.explosions.add(explosion)
+                if self.entity_store:
+                    self.score += 2 * len(self.enemies)
+                    self.enemies.clear()
+                else:
+                    for enemy in self.enemies:
+                        self.enemy_pool.release(enemy)
+                        self.score += 2
+                self.scheduler.respawn(self, self.scheduler.config['bomb_respawn'])
+
+    # Inimigos esperando na fila de spawn (medido pelo profiler)
+    @property
+    def spawn_queue(self):
+        return self.scheduler.queue
+
+    # Todos os jogadores sem vida (no modo de 1 jogador a partida continua)
+    def all_dead(self):
+        return all(player.health <= 0 for player in self.players)
+
+    # Checksum do estado atual (pontuação, jogadores e entidades), encadeado
+    # com o checksum anterior; usado para verificar replays
+    def checksum(self, value=0):
+        data = [self.frame, self.score]
+        for player in self.players:
+            data += [player.rect.x, player.rect.y, player.health]
+        for group in (self.enemies, self.bullets, self.health_powerups, self.bomb_powerups):
+            data.append(len(group))
+            if isinstance(group, EntityStore):
+                for x, y in group.positions():
+                    data += [x, y]
+                continue
+            for sprite in group:
+                data += [sprite.rect.x, sprite.rect.y]
+        return zlib.crc32(struct.pack(f"<{len(data)}i", *data), value)
+
+    # Camadas desenhadas por cima das estrelas, em ordem
+    def draw_layers(self):
+        return self.layers
+
+# Gravação de uma partida: semente do RNG, naves escolhidas e um byte de input
+# por jogador por frame. O arquivo tem um cabeçalho fixo, os inputs
+# compactados com zlib e, no fim, o número de frames, a pontuação final e o
+# checksum encadeado de todos os frames. Desde a versão 2, depois do rodapé
+# vem a configuração de ondas usada (JSON, vazio para a padrão).
+REPLAY_MAGIC = b"SRRP"
+REPLAY_VERSION = 2
+REPLAY_HEADER = struct.Struct("<4sBBBBQ")
+REPLAY_FOOTER = struct.Struct("<IiI")
+NO_SHIP = 255
+
+class Recording:
+    def __init__(self, seed, player1_ship_index, player2_ship_index=None, waves=None):
+        self.seed = seed
+        self.waves = waves
+        self.ship_indices = (player1_ship_index, player2_ship_index)
+        self.num_players = 1 if player2_ship_index is None else 2
+        self.inputs = bytearray()
+        self.frames = 0
+        self.score = 0
+        self.checksum = 0
+
+    @classmethod
+    def for_state(cls, state):
+        return cls(state.seed, state.player1_ship_index, state.player2_ship_index, state.waves)
+
+    # Guarda os inputs usados em state.step e o checksum do frame resultante
+    def record(self, state, inputs):
+        for idx in range(self.num_players):
+            self.inputs.append(inputs[idx] if idx < len(inputs) else 0)
+        self.frames = state.frame
+        self.score = state.score
+        self.checksum = state.checksum(self.checksum)
+
+    # Volta a gravação para o estado de um rewind (checksum é o da gravação
+    # naquele frame)
+    def rewind(self, state, checksum):
+        del self.inputs[state.frame * self.num_players:]
+        self.frames = state.frame
+        self.score = state.score
+        self.checksum = checksum
+
+    def frame_inputs(self, frame):
+        start = frame * self.num_players
+        return self.inputs[start:start + self.num_players]
+
+    def save(self, path):
+        player2_ship_index = self.ship_indices[1]
+        header = REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.num_players, self.ship_indices[0],
+                                    NO_SHIP if player2_ship_index is None else player2_ship_index, self.seed)
+        body = zlib.compress(bytes(self.inputs), 9)
+        footer = REPLAY_FOOTER.pack(self.frames, self.score, self.checksum)
+        waves = json.dumps(self.waves).encode() if self.waves else b""
+        with open(path, "wb") as f:
+            f.write(header + struct.pack("<I", len(body)) + body + footer + struct.pack("<I", len(waves)) + waves)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, num_players, ship1, ship2, seed = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version not in (1, REPLAY_VERSION):
+            raise ValueError(f"{path}: não é uma gravação do Space Raiders")
+        offset = REPLAY_HEADER.size
+        (body_size,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        recording = cls(seed, ship1, None if ship2 == NO_SHIP else ship2)
+        recording.inputs = bytearray(zlib.decompress(data[offset:offset + body_size]))
+        recording.frames, recording.score, recording.checksum = REPLAY_FOOTER.unpack_from(data, offset + body_size)
+        if version >= 2:
+            offset += body_size + REPLAY_FOOTER.size
+            (waves_size,) = struct.unpack_from("<I", data, offset)
+            if waves_size:
+                recording.waves = json.loads(data[offset + 4:offset + 4 + waves_size])
+        return recording
+
+# Reexecuta uma gravação sem renderizar (tão rápido quanto possível) e confere
+# frames, pontuação e checksum com os valores gravados
+def replay(recording):
+    state = GameState(*recording.ship_indices, seed=recording.seed, waves=recording.waves)
+    check = Recording.for_state(state)
+    for frame in range(recording.frames):
+        inputs = recording.frame_inputs(frame)
+        state.step(inputs)
+        check.record(state, inputs)
+    ok = (check.frames, check.score, check.checksum) == (recording.frames, recording.score, recording.checksum)
+    return state, ok
+
+# Save states: o estado completo da simulação (jogadores, inimigos, tiros,
+# power-ups, explosões, fila de spawns, pontuação e o estado do RNG) num
+# buffer binário de layout fixo, sem pickle: um cabeçalho, o estado do RNG,
+# os jogadores, a tabela de sprites na ordem de all_sprites (a ordem de update
+# e de desenho faz parte da partida), as colunas dos EntityStore, as
+# explosões, os eventos do WaveScheduler e, opcional, as estrelas. Restaurar
+# um snapshot e continuar com os mesmos inputs dá os mesmos checksums da
+# partida original. O snapshot só vale para um GameState com as mesmas naves,
+# o mesmo modo (sprites ou entity_store) e a mesma configuração de ondas.
+SNAPSHOT_MAGIC = b"SRSS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sBBBBIiQIIQIIIIIIII")
+SNAPSHOT_RNG = struct.Struct("<625Id")
+SNAPSHOT_PLAYER = struct.Struct("<iiihBBB")
+SNAPSHOT_SPRITE = struct.Struct("<Biiii")    # tipo, x, y, velocidade, nave
+SNAPSHOT_EXPLOSION = struct.Struct("<iiii")  # centro, raio e quadro
+SNAPSHOT_TIMER = struct.Struct("<iHQI")      # frame, prioridade, ordem, repetição
+SNAPSHOT_QUEUE = struct.Struct("<iHQBiiii")  # frame, prioridade, ordem, flags, x, y, velocidade
+SNAPSHOT_RUNNING = 1
+SNAPSHOT_ENTITY_STORE = 2
+SNAPSHOT_GAUSS = 4
+QUEUE_POSITION = 1
+QUEUE_SPEED = 2
+QUEUE_SPEED_RANGE = 4
+SPRITE_PLAYER, SPRITE_ENEMY, SPRITE_BULLET, SPRITE_HEALTH, SPRITE_BOMB = range(5)
+SNAPSHOT_KINDS = {Player: SPRITE_PLAYER, Enemy: SPRITE_ENEMY, Bullet: SPRITE_BULLET,
+                  HealthPowerup: SPRITE_HEALTH, BombPowerup: SPRITE_BOMB}
 
+def snapshot_state(state, stars=None):
+    _, rng_state, gauss_next = state.rng.getstate()
+    flags = SNAPSHOT_RUNNING if state.running else 0
+    sprites = []
+    columns = []
+    if state.entity_store:
+        flags |= SNAPSHOT_ENTITY_STORE
+        columns = [store.snapshot() for store in state.entity_stores]
+    if gauss_next is not None:
+        flags |= SNAPSHOT_GAUSS
+    for sprite in state.all_sprites:
+        kind = SNAPSHOT_KINDS[type(sprite)]
+        if kind == SPRITE_PLAYER:
+            sprites.append(SNAPSHOT_SPRITE.pack(kind, state.players.index(sprite), 0, 0, 0))
+        else:
+            sprites.append(SNAPSHOT_SPRITE.pack(kind, sprite.rect.x, sprite.rect.y, sprite.speed,
+                                                getattr(sprite, 'ship_index', 0)))
+    players = [SNAPSHOT_PLAYER.pack(player.rect.x, player.rect.y, player.health, player.invulnerable_timer,
+                                    player.shoot_pressed, player.inputs,
+                                    player.image is get_state_image(player.original_image, 'faded'))
+               for player in state.players]
+    explosions = [SNAPSHOT_EXPLOSION.pack(explosion.x, explosion.y, explosion.radius, explosion.frame)
+                  for explosion in state.explosions]
+    scheduler = state.scheduler
+    timers = [SNAPSHOT_TIMER.pack(frame, priority, order, data[2] if data[0] == 'wave' else 0)
+              for frame, priority, order, data in scheduler.timers]
+    spawn_queue = []
+    for frame, priority, order, (position, speed) in scheduler.queue:
+        queue_flags = 0
+        x = y = low = high = 0
+        if position:
+            queue_flags |= QUEUE_POSITION
+            x, y = position
+        if isinstance(speed, list):
+            queue_flags |= QUEUE_SPEED_RANGE
+            low, high = speed
+        elif speed is not None:
+            queue_flags |= QUEUE_SPEED
+            low = speed
+        spawn_queue.append(SNAPSHOT_QUEUE.pack(frame, priority, order, queue_flags, x, y, low, high))
+    star_data = stars.snapshot() if stars else b""
+    player2_ship_index = state.player2_ship_index
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags, state.player1_ship_index,
+                                  NO_SHIP if player2_ship_index is None else player2_ship_index,
+                                  state.frame, state.score, state.seed,
+                                  state.stats['health_powerups'], state.stats['bomb_powerups'],
+                                  scheduler.order, scheduler.config_crc, len(sprites),
+                                  columns[0].shape[1] if columns else 0, columns[1].shape[1] if columns else 0,
+                                  len(explosions), len(timers), len(spawn_queue), len(star_data))
+    rng = SNAPSHOT_RNG.pack(*rng_state, gauss_next or 0.0)
+    return b"".join([header, rng, *players, *sprites] + [column.tobytes() for column in columns] +
+                    explosions + timers + spawn_queue + [star_data])
+
+# Volta o GameState (e as estrelas, se o snapshot tiver) para o snapshot
+def restore_state(state, data, stars=None):
+    (magic, version, flags, ship1, ship2, frame, score, seed, health_powerups, bomb_powerups, order,
+     config_crc, sprite_count, enemy_count, bullet_count, explosion_count, timer_count, queue_count,
+     star_size) = SNAPSHOT_HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError("não é um save state do Space Raiders")
+    player2_ship_index = NO_SHIP if state.player2_ship_index is None else state.player2_ship_index
+    if (ship1, ship2, bool(flags & SNAPSHOT_ENTITY_STORE), config_crc) != \
+            (state.player1_ship_index, player2_ship_index, state.entity_store, state.scheduler.config_crc):
+        raise ValueError("save state de outra partida (naves, modo ou ondas diferentes)")
+    offset = SNAPSHOT_HEADER.size
+    rng = SNAPSHOT_RNG.unpack_from(data, offset)
+    offset += SNAPSHOT_RNG.size
+
+    state.frame = frame
+    state.score = score
+    state.seed = seed
+    state.running = bool(flags & SNAPSHOT_RUNNING)
+    state.stats = {'health_powerups': health_powerups, 'bomb_powerups': bomb_powerups}
+
+    for player, record in zip(state.players, SNAPSHOT_PLAYER.iter_unpack(
+            data[offset:offset + SNAPSHOT_PLAYER.size * len(state.players)])):
+        x, y, player.health, player.invulnerable_timer, shoot_pressed, player.inputs, faded = record
+        player.rect.topleft = (x, y)
+        player.shoot_pressed = bool(shoot_pressed)
+        player.image = get_state_image(player.original_image, 'faded' if faded else 'normal')
+    offset += SNAPSHOT_PLAYER.size * len(state.players)
+
+    # Tudo o que está no jogo sai e volta na ordem do snapshot (os inimigos
+    # voltam para o pool)
+    if not state.entity_store:
+        for enemy in list(state.enemies):
+            state.enemy_pool.release(enemy)
+        state.bullets.empty()
+    state.all_sprites.empty()
+    state.health_powerups.empty()
+    state.bomb_powerups.empty()
+    state.explosions.empty()
+    end = offset + SNAPSHOT_SPRITE.size * sprite_count
+    for kind, x, y, speed, ship_index in SNAPSHOT_SPRITE.iter_unpack(data[offset:end]):
+        if kind == SPRITE_PLAYER:
+            state.all_sprites.add(state.players[x])
+            continue
+        if kind == SPRITE_ENEMY:
+            sprite = state.enemy_pool.restore(ship_index)
+            state.enemies.add(sprite)
+        elif kind == SPRITE_BULLET:
+            sprite = Bullet(0, 0)
+            state.bullets.add(sprite)
+        elif kind == SPRITE_HEALTH:
+            sprite = HealthPowerup(state.rng)
+            state.health_powerups.add(sprite)
+        else:
+            sprite = BombPowerup(state.rng)
+            state.bomb_powerups.add(sprite)
+        sprite.rect.topleft = (x, y)
+        sprite.speed = speed
+        state.all_sprites.add(sprite)
+    offset = end
+
+    if state.entity_store:
+        for store, count in zip(state.entity_stores, (enemy_count, bullet_count)):
+            size = 4 * len(store.snapshot_columns) * count
+            store.restore(np.frombuffer(data, np.int32, size // 4, offset).reshape(len(store.snapshot_columns), count))
+            offset += size
+
+    end = offset + SNAPSHOT_EXPLOSION.size * explosion_count
+    for x, y, radius, explosion_frame in SNAPSHOT_EXPLOSION.iter_unpack(data[offset:end]):
+        explosion = Explosion(x, y)
+        explosion.radius = radius
+        explosion.frame = explosion_frame
+        if explosion_frame:
+            explosion.image = explosion.frames[explosion_frame - 1]
+            explosion.rect.size = explosion.image.get_size()
+            explosion.rect.center = (x, y)
+        state.explosions.add(explosion)
+    offset = end
+
+    scheduler = state.scheduler
+    powerups = scheduler.config['powerups']
+    scheduler.timers = []
+    end = offset + SNAPSHOT_TIMER.size * timer_count
+    for timer_frame, priority, timer_order, repetition in SNAPSHOT_TIMER.iter_unpack(data[offset:end]):
+        if priority < len(powerups):
+            event = ('powerup', powerups[priority])
+        else:
+            event = ('wave', scheduler.waves[priority - len(powerups)], repetition)
+        scheduler.timers.append((timer_frame, priority, timer_order, event))
+    offset = end
+    scheduler.queue = []
+    end = offset + SNAPSHOT_QUEUE.size * queue_count
+    for queue_frame, priority, queue_order, queue_flags, x, y, low, high in \
+            SNAPSHOT_QUEUE.iter_unpack(data[offset:end]):
+        position = (x, y) if queue_flags & QUEUE_POSITION else None
+        if queue_flags & QUEUE_SPEED_RANGE:
+            speed = [low, high]
+        else:
+            speed = low if queue_flags & QUEUE_SPEED else None
+        scheduler.queue.append((queue_frame, priority, queue_order, (position, speed)))
+    scheduler.order = order
+    offset = end
+
+    if stars and star_size:
+        stars.restore(data[offset:offset + star_size])
+
+    # O RNG volta por último: recriar sprites acima também sorteia valores
+    state.rng.setstate((3, rng[:-1], rng[-1] if flags & SNAPSHOT_GAUSS else None))
+    return state
+
+# Cria um GameState a partir de um snapshot (waves deve ser a mesma
+# configuração da partida salva)
+def state_from_snapshot(data, waves=None, stars=None):
+    _, _, flags, ship1, ship2, _, _, seed = SNAPSHOT_HEADER.unpack_from(data)[:8]
+    state = GameState(ship1, None if ship2 == NO_SHIP else ship2, seed=seed,
+                      entity_store=bool(flags & SNAPSHOT_ENTITY_STORE), waves=waves)
+    return restore_state(state, data, stars)
+
+# Últimos REWIND_SECONDS segundos de snapshots (um por passo da simulação)
+# para voltar no tempo segurando BACKSPACE. Junto de cada snapshot fica um
+# valor qualquer do chamador (no jogo, o checksum da gravação naquele frame).
+REWIND_SECONDS = 10
+
+class RewindBuffer:
+    def __init__(self, seconds=REWIND_SECONDS):
+        self.snapshots = deque(maxlen=seconds * FPS)
+
+    def push(self, state, stars=None, extra=None):
+        self.snapshots.append((snapshot_state(state, stars), extra))
+
+    # Descarta o snapshot do frame atual e devolve o anterior (que continua
+    # no buffer como o novo frame atual), ou None se não houver mais
+    def rewind(self):
+        if len(self.snapshots) < 2:
+            return None
+        self.snapshots.pop()
+        return self.snapshots[-1]
+
+    def clear(self):
+        self.snapshots.clear()
+
+    def __len__(self):
+        return len(self.snapshots)
+
+# Arquivo de quick-save: o snapshot (com as estrelas) e a configuração de
+# ondas da partida (JSON, vazio para a padrão)
+def save_snapshot_file(path, data, waves=None):
+    waves = json.dumps(waves).encode() if waves else b""
+    # Grava num arquivo temporário e troca: um save interrompido não estraga o anterior
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(struct.pack("<I", len(data)) + data + struct.pack("<I", len(waves)) + waves)
+    os.replace(temp_path, path)
+
+def load_snapshot_file(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        (size,) = struct.unpack_from("<I", data)
+        snapshot = data[4:4 + size]
+        (waves_size,) = struct.unpack_from("<I", data, 4 + size)
+    except struct.error:
+        raise ValueError(f"{path}: não é um save state do Space Raiders")
+    if snapshot[:4] != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path}: não é um save state do Space Raiders")
+    waves = json.loads(data[8 + size:8 + size + waves_size]) if waves_size else None
+    return snapshot, waves
+
+# Grava os quick-saves numa thread própria (o snapshot em si é tirado no
+# loop do jogo; só o disco fica fora dele)
+QUICKSAVE_PATH = "quicksave.srs"
+
+class QuickSaver:
+    def __init__(self):
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="quicksave", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def save(self, path, data, waves=None):
+        self.pending.put((path, data, waves))
+
+    def run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            try:
+                save_snapshot_file(*item)
+            except OSError as e:
+                print(f"Falha ao gravar {item[0]}: {e}")
+
+    # Grava o que falta e encerra a thread (pode ser chamado mais de uma vez)
+    def close(self):
+        if self.thread.is_alive():
+            self.pending.put(None)
+            self.thread.join()
+
+# Recordes: cada partida terminada vira uma linha num banco SQLite. Quem grava
+# é uma thread própria, então o disco nunca trava o loop do jogo; as partidas
+# que chegam juntas (até SCORES_COMMIT_INTERVAL segundos) vão num único
+# commit. O banco usa WAL (write-ahead log): um commit interrompido no meio
+# não corrompe o arquivo. A tela de game over lê só o top-N guardado em
+# memória, atualizado na hora em que a partida termina. A variável de
+# ambiente SPACERAIDERS_SCORES troca o arquivo (vazia desliga).
+SCORES_DB = os.environ.get("SPACERAIDERS_SCORES", "scores.db")
+SCORES_TOP = 8
+SCORES_COMMIT_INTERVAL = 0.5
+SCORES_COMMIT_BATCH = 64
+SCORES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    score INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    players INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    health_powerups INTEGER NOT NULL,
+    bomb_powerups INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_score ON sessions (score DESC);
+"""
+SCORE_FIELDS = ['played_at', 'score', 'frames', 'players', 'seed', 'health_powerups', 'bomb_powerups']
+
+class ScoreStore:
+    def __init__(self, path=SCORES_DB, top_n=SCORES_TOP):
+        self.path = path
+        self.top_n = top_n
+        self.lock = threading.Lock()
+        self.top = []        # melhores partidas, da maior para a menor pontuação
+        self.sessions = 0    # partidas no banco mais as ainda na fila
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="scores", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    # Dados de uma partida terminada
+    @staticmethod
+    def entry(state):
+        return {
+            'played_at': time.time(),
+            'score': state.score,
+            'frames': state.frame,
+            'players': len(state.players),
+            'seed': state.seed,
+            'health_powerups': state.stats['health_powerups'],
+            'bomb_powerups': state.stats['bomb_powerups'],
+        }
+
+    # Põe a partida na fila de gravação e no top-N (não espera o disco)
+    def submit(self, state):
+        entry = self.entry(state)
+        with self.lock:
+            self.sessions += 1
+            self.merge([entry])
+        self.pending.put(entry)
+        return entry
+
+    def merge(self, entries):
+        self.top = sorted(self.top + entries, key=lambda e: (-e['score'], e['played_at']))[:self.top_n]
+
+    def leaderboard(self):
+        with self.lock:
+            return list(self.top)
+
+    def session_count(self):
+        with self.lock:
+            return self.sessions
+
+    # Thread de gravação: lê o top-N do banco e depois grava as partidas em lotes
+    def run(self):
+        try:
+            db = sqlite3.connect(self.path)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCORES_SCHEMA)
+            rows = db.execute(f"SELECT {', '.join(SCORE_FIELDS)} FROM sessions ORDER BY score DESC, played_at LIMIT ?",
+                              (self.top_n,)).fetchall()
+            (count,) = db.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        except sqlite3.Error as e:
+            print(f"Recordes desligados ({self.path}): {e}")
+            self.drain()
+            return
+        with self.lock:
+            self.sessions += count
+            self.merge([dict(zip(SCORE_FIELDS, row)) for row in rows])
+        insert = f"INSERT INTO sessions ({', '.join(SCORE_FIELDS)}) VALUES ({', '.join('?' * len(SCORE_FIELDS))})"
+        running = True
+        while running:
+            batch = [self.pending.get()]
+            deadline = time.perf_counter() + SCORES_COMMIT_INTERVAL
+            while batch[-1] is not None and len(batch) < SCORES_COMMIT_BATCH:
+                try:
+                    batch.append(self.pending.get(timeout=max(0, deadline - time.perf_counter())))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                running = False
+                batch.pop()
+            try:
+                with db:
+                    db.executemany(insert, [[entry[name] for name in SCORE_FIELDS] for entry in batch])
+            except sqlite3.Error as e:
+                print(f"Falha ao gravar recordes: {e}")
+        db.close()
+
+    # Sem banco: só esvazia a fila até close()
+    def drain(self):
+        while self.pending.get() is not None:
+            pass
+
+    # Grava o que falta e encerra a thread (pode ser chamado mais de uma vez)
+    def close(self):
+        if self.thread.is_alive():
+            self.pending.put(None)
+            self.thread.join()
+
+# Tela de game over: as estrelas continuam andando a GAME_OVER_FPS quadros
+# por segundo (na mesma velocidade do jogo) e o loop dorme entre os quadros
+class GameOverScreen(MenuScreen):
+    frame_time = 1000 // GAME_OVER_FPS
+
+    def __init__(self, stars, score_text, leaderboard=None, current=None, profiler=NULL_PROFILER, sessions=None):
+        super().__init__()
+        self.stars = stars
+        self.score_text = score_text
+        self.leaderboard = leaderboard
+        self.sessions = sessions
+        self.current = current
+        self.profiler = profiler
+
+    def handle(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
+                self.running = False
+            if event.key == pygame.K_ESCAPE:
+                self.quit()
+        return False
+
+    def animate(self):
+        for _ in range(FPS // GAME_OVER_FPS):
+            self.stars.update()
+        return True
+
+    def draw(self, screen):
+        screen.fill(BLACK)
+        self.stars.draw(screen)
+        draw_game_over(screen, self.score_text, self.leaderboard, self.current, self.sessions)
+
+    def quit(self):
+        self.profiler.close()
+        super().quit()
+
+# Desenha um frame do jogo (consumidor opcional do GameState). Com um
+# profiler que conta camadas, soma os blits e a área desenhada de cada uma
+def draw_game(screen, state, stars, hud, interpolation=None, profiler=NULL_PROFILER):
+    screen.fill(BLACK)
+    stars.draw(screen)
+    if profiler.counting:
+        star_rects = stars.rects()
+        profiler.count_layer('background', 1 + len(star_rects), WIDTH * HEIGHT + rects_area(star_rects))
+    for layer in state.draw_layers():
+        sequence = blit_sequence(layer, interpolation)
+        screen.blits(sequence, False)
+        if profiler.counting:
+            profiler.count_layer(layer.name, len(sequence), sequence_area(sequence))
+    # Mostra a pontuação e as barras de vida
+    hud.update(state.score, state.players)
+    hud.draw(screen)
+    if profiler.counting:
+        profiler.count_layer('hud', len(hud.areas), rects_area(hud.areas))
+
+# Renderização do jogo na tela. No modo "full" limpa a tela inteira e faz flip
+# a cada frame. No modo "dirty" apaga só as áreas ocupadas no frame anterior e
+# no atual, redesenha por cima e envia para o monitor só essas áreas com
+# display.update(rects). Se a área suja passar de DIRTY_THRESHOLD da tela ou
+# houver retângulos demais, o frame é enviado inteiro com flip.
+RENDER_MODES = ['full', 'dirty']
+DIRTY_THRESHOLD = 0.35
+DIRTY_MAX_RECTS = 400
+
+class Renderer:
+    def __init__(self, screen, mode="full", threshold=DIRTY_THRESHOLD, max_rects=DIRTY_MAX_RECTS):
+        self.screen = screen
+        self.mode = mode
+        self.threshold = threshold * screen.get_width() * screen.get_height()
+        self.max_rects = max_rects
+        self.prev_rects = None  # None: o próximo frame precisa ser desenhado inteiro
+        self.full_flips = 0
+        self.dirty_updates = 0
+
+    # interpolation (opcional) desenha os sprites entre dois passos da simulação
+    def render(self, state, stars, hud, profiler=NULL_PROFILER, interpolation=None):
+        if self.mode == "dirty" and stars.count * 2 <= self.max_rects:
+            self.render_dirty(state, stars, hud, profiler, interpolation)
+            return
+        draw_game(self.screen, state, stars, hud, interpolation, profiler)
+        profiler.draw_overlay(self.screen)
+        profiler.mark('draw')
+        pygame.display.flip()
+        profiler.mark('flip')
+        self.full_flips += 1
+        self.prev_rects = None
+
+    def render_dirty(self, state, stars, hud, profiler, interpolation=None):
+        screen = self.screen
+        layers = state.draw_layers()
+        rects = stars.rects()
+        sequences = [blit_sequence(layer, interpolation) for layer in layers]
+        for sequence in sequences:
+            rects.extend(pygame.Rect(position[0], position[1], *image.get_size()) for image, position in sequence)
+        # Só a parte dentro da tela: fill com y negativo não corta o retângulo,
+        # desloca (apagaria pixels do HUD fora da área informada)
+        rects = clip_rects(rects, screen.get_rect())
+        hud_changed = hud.update(state.score, state.players)
+        erased = None
+        if self.prev_rects is not None:
+            # Apaga o que foi desenhado no frame anterior e o espaço do atual.
+            # O HUD tem transparência, então cada área dele que encosta no que
+            # foi apagado também é apagada e redesenhada inteira (uma vez só).
+            erased = self.prev_rects + rects
+            if hud_changed:
+                hud_areas = hud.areas
+                erased += hud.previous_areas + hud_areas
+            else:
+                hud_areas = hud.touched_areas(erased)
+                erased += hud_areas
+            # Área suja grande demais: sai mais barato redesenhar tudo
+            if len(erased) > self.max_rects or \
+                    sum(rect.width * rect.height for rect in erased) > self.threshold:
+                erased = None
+        if erased is None:
+            screen.fill(BLACK)
+        else:
+            for rect in erased:
+                screen.fill(BLACK, rect)
+        stars.draw(screen)
+        for sequence in sequences:
+            screen.blits(sequence, False)
+        if erased is None:
+            hud.draw(screen)
+            hud_areas = hud.areas
+        else:
+            hud.draw_areas(screen, hud_areas)
+        if profiler.counting:
+            star_rects = stars.rects()
+            cleared = [screen.get_rect()] if erased is None else erased
+            profiler.count_layer('background', len(cleared) + len(star_rects),
+                                 rects_area(cleared) + rects_area(star_rects))
+            for layer, sequence in zip(layers, sequences):
+                profiler.count_layer(layer.name, len(sequence), sequence_area(sequence))
+            profiler.count_layer('hud', len(hud_areas), rects_area(hud_areas))
+        overlay_rect = profiler.draw_overlay(screen)
+        if overlay_rect:
+            rects.append(overlay_rect)
+            if erased is not None:
+                erased.append(overlay_rect)
+        profiler.mark('draw')
+
+        if erased is None:
+            pygame.display.flip()
+            self.full_flips += 1
+        else:
+            pygame.display.update(erased)
+            self.dirty_updates += 1
+        profiler.mark('flip')
+        self.prev_rects = rects
+
+# Ritmo dos frames. A simulação sempre avança em passos fixos de STEP
+# segundos; a tela é desenhada no ritmo do modo escolhido ("60", "30" para
+# economizar energia, "uncapped" sem limite ou "vsync" no ritmo do monitor) e
+# o tempo que sobra entre passos vira o alpha da interpolação.
+STEP = 1 / FPS
+MAX_FRAME_TIME = 0.25  # um frame muito longo não vira uma avalanche de passos
+FPS_MODES = {'60': 60, '30': 30, 'uncapped': 0, 'vsync': 0}
+
+class FramePacer:
+    def __init__(self, mode="60"):
+        self.mode = mode
+        self.fps = FPS_MODES[mode]
+        self.last = time.perf_counter()
+        self.work = 0.0  # tempo do último frame sem contar a espera
+
+    # Espera o próximo frame e devolve quantos segundos se passaram
+    def tick(self):
+        self.work = time.perf_counter() - self.last
+        if self.fps:
+            clock.tick(self.fps)
+        now = time.perf_counter()
+        elapsed = min(now - self.last, MAX_FRAME_TIME)
+        self.last = now
+        return elapsed
+
+    # Orçamento de tempo de um frame
+    def budget(self):
+        return 1 / (self.fps or FPS)
+
+# Liga o vsync recriando a janela (só funciona com SCALED); devolve False se
+# o driver não suportar
+def enable_vsync():
+    global screen
+    try:
+        screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.SCALED, vsync=1)
+    except pygame.error:
+        return False
+    display_masks.clear()
+    return True
+
+# Qualidade automática: quando o tempo médio de frame passa do orçamento, usa
+# menos estrelas e deixa de desenhar os maiores quadros das explosões (nada
+# novo é desenhado ou alocado na troca); quando sobra bastante tempo, volta a
+# melhorar. Só muda o desenho, nunca a simulação.
+QUALITY_LEVELS = [(STAR_COUNT, 1.0), (STAR_COUNT // 2, 0.7), (STAR_COUNT // 4, 0.5)]  # (estrelas, explosion_detail)
+QUALITY_WINDOW = 60    # frames medidos antes de cada decisão
+QUALITY_RECOVER = 0.6  # volta a subir abaixo desta fração do orçamento
+
+class QualityScaler:
+    def __init__(self, budget, window=QUALITY_WINDOW):
+        self.budget = budget
+        self.times = deque(maxlen=window)
+        self.level = 0
+
+    def update(self, frame_time, stars):
+        self.times.append(frame_time)
+        if len(self.times) < self.times.maxlen:
+            return
+        mean = sum(self.times) / len(self.times)
+        if mean > self.budget and self.level < len(QUALITY_LEVELS) - 1:
+            self.set_level(self.level + 1, stars)
+        elif mean < self.budget * QUALITY_RECOVER and self.level > 0:
+            self.set_level(self.level - 1, stars)
+
+    def set_level(self, level, stars):
+        global explosion_detail
+        self.level = level
+        stars.visible, explosion_detail = QUALITY_LEVELS[level]
+        self.times.clear()
+
+# Função principal do jogo com suporte a multiplayer. Com record_path, cada
+# partida é gravada nesse arquivo (a última sobrescreve as anteriores). Com
+# profiler, o tempo de cada fase é medido (F3 liga/desliga o overlay).
+# render_mode escolhe a renderização ("full" ou "dirty", ver Renderer).
+# entity_store guarda inimigos e tiros em arrays (ver EntityStore).
+# fps_mode escolhe o ritmo da tela (ver FramePacer) e auto_quality liga a
+# qualidade automática (ver QualityScaler). check_surfaces avisa quando uma
+# Surface fora do formato da tela é desenhada (ver SurfaceChecker). waves é a configuração de ondas
+# (ver load_wave_config; None usa as regras do jogo original). scores_path é
+# o banco de recordes (ver ScoreStore; vazio desliga).
+def main(record_path=None, profiler=NULL_PROFILER, render_mode="full", entity_store=False,
+         fps_mode="60", auto_quality=True, waves=None, scores_path=SCORES_DB, check_surfaces=False,
+         resume_path=None):
+    recording = None
+    if check_surfaces:
+        enable_surface_check()
+    scores = ScoreStore(scores_path) if scores_path else None
+    saver = QuickSaver()
+    if fps_mode == "vsync" and not enable_vsync():
+        print("vsync não suportado aqui; usando o modo sem limite")
+    while True:
         # Controles para cada jogador
         controls1 = {'left': pygame.K_LEFT, 'right': pygame.K_RIGHT, 'select': [pygame.K_RETURN, pygame.K_SPACE]}
         controls2 = {'left': pygame.K_a, 'right': pygame.K_d, 'select': [pygame.K_LSHIFT, pygame.K_RSHIFT]}
+        stars = Starfield()
 
-        # Seleção de naves para cada jogador
-        if num_players == 2:
-            player1_ship_index = select_ship(1, controls1)
-            player2_ship_index = select_ship(2, controls2, exclude_ships=[player1_ship_index])
+        if resume_path:
+            # Continua um quick-save (naves, modo e ondas vêm do arquivo); os
+            # inimigos do snapshot precisam das sprites já carregadas
+            wait_for_assets()
+            snapshot, saved_waves = load_snapshot_file(resume_path)
+            resume_path = None
+            state = state_from_snapshot(snapshot, saved_waves, stars)
+            num_players = state.num_players
         else:
-            player1_ship_index = select_ship(1, controls1)
-            player2_ship_index = None
+            # Home screen: escolha 1 ou 2 jogadores
+            num_players = select_num_players()
+
+            # Seleção de naves para cada jogador
+            if num_players == 2:
+                player1_ship_index = select_ship(1, controls1)
+                player2_ship_index = select_ship(2, controls2, exclude_ships=[player1_ship_index])
+            else:
+                player1_ship_index = select_ship(1, controls1)
+                player2_ship_index = None
 
+            state = GameState(player1_ship_index, player2_ship_index, entity_store=entity_store, waves=waves)
 
         # Adiciona controles de movimento e tiro
         controls1.update({'up': pygame.K_UP, 'down': pygame.K_DOWN, 'shoot': pygame.K_SPACE})
         controls2.update({'up': pygame.K_w, 'down': pygame.K_s, 'shoot': pygame.K_LSHIFT})
+        controls = [controls1, controls2][:num_players]
 
-        # Cria jogadores
-        player1 = Player(player1_ship_index, controls1, start_pos=(WIDTH//2 - 80, HEIGHT - 10))
-        if num_players == 2:
-            player2 = Player(player2_ship_index, controls2, start_pos=(WIDTH//2 + 80, HEIGHT - 10))
-        else:
-            player2 = None
-
-        all_sprites = pygame.sprite.Group()
-        enemies = pygame.sprite.Group()
-        bullets = pygame.sprite.Group()
-        health_powerups = pygame.sprite.Group()
-        bomb_powerups = pygame.sprite.Group()
-        explosions = pygame.sprite.Group()
-
-        all_sprites.add(player1)
-        if player2:
-            all_sprites.add(player2)
-
-        for _ in range(5):
-            a = Enemy(player1_ship_index)
-            all_sprites.add(a)
-            enemies.add(a)
-        score = 0
-        font = pygame.font.SysFont(None, 36)
-        health_spawn_timer = 0
-        bomb_spawn_timer = 0
-        stars = [Star() for _ in range(80)]
+        state.profiler = profiler
+        recording = None
+        if record_path:
+            if state.frame:
+                print("A gravação começa no frame 0; esta partida retomada não será gravada")
+            else:
+                recording = Recording.for_state(state)
+        rewind = RewindBuffer()
+        rewind.push(state, stars, 0)
+        hud = HUD()
+        renderer = Renderer(screen, render_mode)
+        pacer = FramePacer(fps_mode)
+        quality = QualityScaler(pacer.budget())
+        interpolation = Interpolation()
+        accumulator = 0.0
+        # Teclas apertadas desde o último passo (um toque rápido entre dois
+        # passos não se perde quando a tela roda mais rápido que a simulação)
+        pressed_keys = set()
 
-        running = True
-        while running:
-            clock.tick(FPS)
+        while state.running:
+            accumulator += pacer.tick()
+            if auto_quality:
+                quality.update(pacer.work, stars)
+            reset_frame_allocs()
+            profiler.begin_frame()
             # Eventos
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    if recording:
+                        recording.save(record_path)
+                    profiler.close()
                     pygame.quit()
                     sys.exit()
                 if event.type == pygame.KEYDOWN:
-                    # Player 1 shoot (only if alive)
-                    if player1.alive() and player1.health > 0:
-                        if event.key == controls1['shoot'] and not player1.shoot_pressed:
-                            bullet = Bullet(player1.rect.centerx, player1.rect.top)
-                            all_sprites.add(bullet)
-                            bullets.add(bullet)
-                            player1.shoot_pressed = True
-                        if event.key == controls1['shoot']:
-                            player1.shoot_pressed = True
-                    if player2 and player2.alive() and player2.health > 0:
-                        # Player 2 shoot (only if alive)
-                        if event.key == controls2['shoot'] and not player2.shoot_pressed:
-                            bullet = Bullet(player2.rect.centerx, player2.rect.top)
-                            all_sprites.add(bullet)
-                            bullets.add(bullet)
-                            player2.shoot_pressed = True
-                        if event.key == controls2['shoot']:
-                            player2.shoot_pressed = True
-                if event.type == pygame.KEYUP:
-                    if player1.alive() and event.key == controls1['shoot']:
-                        player1.shoot_pressed = False
-                    if player2 and player2.alive() and event.key == controls2['shoot']:
-                        player2.shoot_pressed = False
-
-            # Atualiza estrelas
-            for star in stars:
-                star.update()
-            all_sprites.update()
-            explosions.update()
-
-            # Spawna power-ups de vida ocasionalmente
-            health_spawn_timer += 1
-            if health_spawn_timer >= 600:
-                if random.randint(1, 100) <= 30:
-                    health_powerup = HealthPowerup()
-                    all_sprites.add(health_powerup)
-                    health_powerups.add(health_powerup)
-                health_spawn_timer = 0
-
-            # Spawna power-ups de bomba ocasionalmente
-            bomb_spawn_timer += 1
-            if bomb_spawn_timer >= 900:
-                if random.randint(1, 100) <= 15:
-                    bomb_powerup = BombPowerup()
-                    all_sprites.add(bomb_powerup)
-                    bomb_powerups.add(bomb_powerup)
-                bomb_spawn_timer = 0
-
-            # Colisões de tiros com inimigos
-            hits = pygame.sprite.groupcollide(enemies, bullets, True, True)
-            for hit in hits:
-                score += 1
-                new_enemy = Enemy(player1_ship_index)
-                all_sprites.add(new_enemy)
-                enemies.add(new_enemy)
-
-            # Colisão inimigos com jogadores
-            for idx, player in enumerate([player1, player2] if player2 else [player1]):
-                if player is None:
-                    continue
-                enemy_hits = pygame.sprite.spritecollide(player, enemies, False)
-                for enemy in enemy_hits:
-                    if player.take_damage():
-                        if player.health <= 0:
-                            # Remove player from all sprite groups so he disappears
-                            player.kill()
-
-            # Check if all players are dead to end the game
-            if player2:
-                if player1.health <= 0 and player2.health <= 0:
-                    running = False
-
-            # Colisão com power-ups de vida (aplica para todos os jogadores)
-            for idx, player in enumerate([player1, player2] if player2 else [player1]):
-                if player is None:
-                    continue
-                health_hits = pygame.sprite.spritecollide(player, health_powerups, True)
-                for health_powerup in health_hits:
-                    # Revive friend if possible
-                    if num_players == 2 and player.health == player.max_health:
-                        friend = player2 if player is player1 else player1
-                        if friend and (not friend.alive() or friend.health <= 0):
-                            friend.health = 1
-                            if not friend.alive():
-                                all_sprites.add(friend)
-                            if friend is player1:
-                                friend.rect.centerx, friend.rect.bottom = (WIDTH//2 - 80, HEIGHT - 10)
-                            else:
-                                friend.rect.centerx, friend.rect.bottom = (WIDTH//2 + 80, HEIGHT - 10)
-                    else:
-                        player.heal()
-
-            # Colisão com power-ups de bomba (aplica para todos os jogadores)
-            for idx, player in enumerate([player1, player2] if player2 else [player1]):
-                if player is None:
+                    pressed_keys.add(event.key)
+                    if event.key == pygame.K_F3:
+                        profiler.toggle_overlay()
+                    if event.key == pygame.K_F5:
+                        saver.save(QUICKSAVE_PATH, snapshot_state(state, stars), state.waves)
+                    if event.key == pygame.K_F9 and os.path.exists(QUICKSAVE_PATH):
+                        try:
+                            restore_state(state, load_snapshot_file(QUICKSAVE_PATH)[0], stars)
+                        except ValueError as e:
+                            print(f"Quick-load: {e}")
+                        else:
+                            rewind.clear()
+                            rewind.push(state, stars, 0)
+                            if recording:
+                                print("Quick-load: a gravação parou (os inputs anteriores não levam a este estado)")
+                                recording.save(record_path)
+                                recording = None
+            keys = pygame.key.get_pressed()
+            profiler.mark('events')
+
+            # Atualiza estrelas e a simulação em passos fixos
+            while accumulator >= STEP and state.running:
+                interpolation.capture(state)
+                # Segurando BACKSPACE a partida volta um passo por vez
+                previous = rewind.rewind() if keys[pygame.K_BACKSPACE] else None
+                if previous:
+                    restore_state(state, previous[0], stars)
+                    if recording:
+                        recording.rewind(state, previous[1])
+                    pressed_keys.clear()
+                    accumulator -= STEP
+                    profiler.mark('history')
                     continue
-                bomb_hits = pygame.sprite.spritecollide(player, bomb_powerups, True)
-                for bomb_powerup in bomb_hits:
-                    explosion = Explosion(WIDTH // 2, HEIGHT // 2)
-                    explosions.add(explosion)
-                    all_sprites.add(explosion)
-                    enemies_killed = len(enemies)
-                    for enemy in enemies:
-                        enemy.kill()
-                        score += 2
-                    for _ in range(5):
-                        new_enemy = Enemy(player1_ship_index)
-                        all_sprites.add(new_enemy)
-                        enemies.add(new_enemy)
+                inputs = [read_input(keys, player_controls, pressed_keys) for player_controls in controls]
+                pressed_keys.clear()
+                stars.update()
+                profiler.mark('stars')
+                state.step(inputs)
+                if recording:
+                    recording.record(state, inputs)
+                rewind.push(state, stars, recording.checksum if recording else 0)
+                profiler.mark('history')
+                accumulator -= STEP
+            interpolation.alpha = accumulator / STEP
 
             # Desenha a tela
-            screen.fill(BLACK)
-            for star in stars:
-                star.draw(screen)
-            all_sprites.draw(screen)
-            explosions.draw(screen)
-            # Mostra a pontuação
-            score_text = font.render(f"Score: {score}", True, WHITE)
-            screen.blit(score_text, (650, 10))
-            draw_health_bar(screen, player1, idx=0)
-            if player2:
-                draw_health_bar(screen, player2, idx=1)
-            pygame.display.flip()
+            renderer.render(state, stars, hud, profiler, interpolation)
+            profiler.end_frame(state)
+
+        if recording:
+            recording.save(record_path)
 
         # GAME OVER SCREEN
-        game_over = True
-        while game_over:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
-                        game_over = False
-                    if event.key == pygame.K_ESCAPE:
-                        pygame.quit()
-                        sys.exit()
-            screen.fill(BLACK)
-            for star in stars:
-                star.update()
-                star.draw(screen)
-            over_font = pygame.font.SysFont(None, 96)
-            over_text = over_font.render("GAME OVER", True, RED)
-            over_rect = over_text.get_rect(center=(WIDTH//2, HEIGHT//2 - 100))
-            screen.blit(over_text, over_rect)
-            score_font = pygame.font.SysFont(None, 60)
-            score_text = score_font.render(f"Score: {score}", True, WHITE)
-            score_rect = score_text.get_rect(center=(WIDTH//2, HEIGHT//2))
-            screen.blit(score_text, score_rect)
-            info_font = pygame.font.SysFont(None, 40)
-            info_text = info_font.render("Pressione ENTER ou ESPAÇO para jogar novamente", True, WHITE)
-            info_rect = info_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 80))
-            screen.blit(info_text, info_rect)
-            esc_text = info_font.render("Pressione ESC para sair", True, WHITE)
-            esc_rect = esc_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 130))
-            screen.blit(esc_text, esc_rect)
-            pygame.display.flip()
+        final_score_text = prepare_surface(get_font(60).render(f"Score: {state.score}", True, WHITE), rle=False)
+        current = leaderboard = sessions = None
+        if scores:
+            current = scores.submit(state)
+            leaderboard = scores.leaderboard()
+            sessions = scores.session_count()
+        GameOverScreen(stars, final_score_text, leaderboard, current, profiler, sessions).run(screen)
+
+# Opções de linha de comando
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Space Raiders")
+    parser.add_argument("--record", metavar="ARQUIVO", help="grava os inputs da partida para replay")
+    parser.add_argument("--replay", metavar="ARQUIVO", help="reexecuta uma gravação sem janela e verifica o resultado")
+    parser.add_argument("--profile", action="store_true", help="mostra o overlay com o tempo de cada fase do frame")
+    parser.add_argument("--profile-out", metavar="ARQUIVO", help="grava o tempo de cada frame em CSV (.csv) ou JSON Lines")
+    parser.add_argument("--render", choices=RENDER_MODES, default="full",
+                        help="full: redesenha e envia a tela inteira; dirty: envia só as áreas que mudaram")
+    parser.add_argument("--entity-store", action="store_true",
+                        help="guarda inimigos e tiros em arrays NumPy em vez de sprites")
+    parser.add_argument("--fps", choices=list(FPS_MODES), default="60",
+                        help="ritmo da tela; a simulação sempre roda a 60 passos por segundo")
+    parser.add_argument("--fixed-quality", action="store_true",
+                        help="não reduz estrelas e explosões quando o frame passa do orçamento")
+    parser.add_argument("--waves", metavar="ARQUIVO",
+                        help="ondas de inimigos e power-ups (JSON, ex.: waves.json)")
+    parser.add_argument("--scores", metavar="ARQUIVO", default=SCORES_DB,
+                        help="banco SQLite dos recordes (vazio desliga)")
+    parser.add_argument("--check-surfaces", action="store_true",
+                        help="avisa quando uma Surface fora do formato da tela é desenhada no jogo")
+    parser.add_argument("--resume", metavar="ARQUIVO",
+                        help=f"continua a partida de um quick-save (F5 grava em {QUICKSAVE_PATH})")
+    return parser.parse_args(argv)
 
-# Executa o jogo
-main()
+# Executa o jogo (importar o módulo não abre o jogo)
+if __name__ == "__main__":
+    args = parse_args()
+    if args.replay:
+        asset_loader.poll(block=True)
+        recording = Recording.load(args.replay)
+        state, ok = replay(recording)
+        print(f"Replay: {state.frame} frames, score {state.score}, " + ("OK" if ok else "DIVERGENTE"))
+        sys.exit(0 if ok else 1)
+    profiler = NULL_PROFILER
+    if args.profile or args.profile_out:
+        profiler = FrameProfiler(args.profile_out, overlay=args.profile)
+    waves = load_wave_config(args.waves) if args.waves else None
+    main(record_path=args.record, profiler=profiler, render_mode=args.render,
+         entity_store=args.entity_store, fps_mode=args.fps, auto_quality=not args.fixed_quality, waves=waves,
+         scores_path=args.scores, check_surfaces=args.check_surfaces, resume_path=args.resume)